@@ -3,14 +3,40 @@ import json
 import time
 import random
 import requests
+from requests.adapters import HTTPAdapter
 import hmac, hashlib, struct, base64
+import mmap
+from array import array
 import re
 import sys
 from itertools import combinations
-from typing import Optional, List, Dict, Set, Tuple
+from operator import itemgetter
+from bisect import bisect_left, bisect_right
+import heapq
+from math import comb
+from typing import Optional, List, Dict, Set, Tuple, NamedTuple
 from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
 import tempfile
 import shutil
+import threading
+import queue
+import asyncio
+from collections import deque, OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+import multiprocessing
+
+try:
+    import numpy as np  # optional: vectorized trade search
+except ImportError:
+    np = None
+
+try:
+    import aiohttp  # optional: async network layer
+except ImportError:
+    aiohttp = None
 
 # Price cache state
 _item_values = {}         # in-memory snapshot used for all decisions/printing
@@ -21,9 +47,13 @@ _last_refresh_attempt = 0.0
 PRICE_CACHE = {}
 PRICE_CACHE_ENABLED = True
 PRICE_CACHE_FILE = "cache/rolimons_itemdetails.json"
+PRICE_CACHE_FORMAT = "columnar"
+PRICE_CACHE_BIN_FILE = "cache/rolimons_itemdetails.bin"
 PRICE_CACHE_TTL = 600
 PRICE_CACHE_MIN_INTERVAL = 120
 PRICE_CACHE_REFRESH_ON_MISSING = True
+PRICE_CACHE_BACKGROUND = True
+PRICE_CACHE_POLL_SECS = 30
 
 # Projected items config (initialized after config is loaded)
 AVOID_PROJECTED = True
@@ -39,9 +69,16 @@ with open(config_path, 'r') as f:
 PRICE_CACHE = config.get("price_cache", {})
 PRICE_CACHE_ENABLED = PRICE_CACHE.get("enabled", True)
 PRICE_CACHE_FILE = PRICE_CACHE.get("file", "cache/rolimons_itemdetails.json")
+# "columnar" keeps a memory-mapped binary snapshot next to the JSON file;
+# "json" keeps the old behaviour. The JSON file is still read as a fallback.
+PRICE_CACHE_FORMAT = PRICE_CACHE.get("format", "columnar")
+PRICE_CACHE_BIN_FILE = PRICE_CACHE.get("binary_file", str(Path(PRICE_CACHE_FILE).with_suffix(".bin")))
 PRICE_CACHE_TTL = int(PRICE_CACHE.get("ttl_seconds", 600))
 PRICE_CACHE_MIN_INTERVAL = int(PRICE_CACHE.get("min_refresh_interval_seconds", 120))
 PRICE_CACHE_REFRESH_ON_MISSING = bool(PRICE_CACHE.get("refresh_on_missing_id", True))
+# refresh off the hot path; the thread re-checks the TTL every poll_seconds
+PRICE_CACHE_BACKGROUND = bool(PRICE_CACHE.get("background_refresh", True))
+PRICE_CACHE_POLL_SECS = float(PRICE_CACHE.get("poll_seconds", 30))
 
 AVOID_PROJECTED = config['trading_preferences'].get('avoid_projected', True)
 AVOID_PROJECTED_OFFER = config['trading_preferences'].get('avoid_projected_offer', False)
@@ -76,19 +113,234 @@ def _safe_write_json_atomic(path: str, data: dict):
 def fetch_item_values_http():
     # single place to call Rolimon's
     try:
-        r = requests.get(rolimons_api_url, timeout=10 if FAST_MODE else 20)
+        r = http_client.get("rolimons_items", rolimons_api_url)
         r.raise_for_status()
         return r.json().get("items", {})
     except Exception:
         return {}
 
+# =====================
+# Columnar price cache
+# =====================
+# File layout (little-endian):
+#   header   magic "RLMC", u16 version, u16 reserved, u32 count,
+#            u32 string table size, f64 fetched_at, padded to 32 bytes
+#   columns  asset_id/rap/value/default as int64[count],
+#            demand/trend/projected/hyped/rare as int8[count],
+#            string offsets as uint32[2 * count + 1]
+#   strings  utf-8 name, acronym, name, acronym, ... addressed by the offsets
+# Every column sits at a fixed offset, so a snapshot is mapped with mmap and
+# sliced into memoryviews without parsing anything up front.
+_COLUMNAR_MAGIC = b"RLMC"
+_COLUMNAR_VERSION = 1
+_COLUMNAR_HEADER = struct.Struct("<4sHHIId")
+_COLUMNAR_HEADER_SIZE = 32
+_COLUMNAR_INT_COLUMNS = ("asset_id", "rap", "value", "default")
+_COLUMNAR_FLAG_COLUMNS = ("demand", "trend", "projected", "hyped", "rare")
+# Position of each column inside a Rolimon's itemdetails row
+_COLUMNAR_ROW_FIELDS = (("rap", 2), ("value", 3), ("default", 4), ("demand", 5),
+                        ("trend", 6), ("projected", 7), ("hyped", 8), ("rare", 9))
+
+
+def _column_int(arr, idx: int) -> int:
+    # Absent / null fields collapse to Rolimon's own "not set" marker
+    try:
+        v = arr[idx]
+        return -1 if v is None else int(v)
+    except (IndexError, TypeError, ValueError):
+        return -1
+
+
+def _columnar_layout(count: int):
+    # (column, array typecode, item size, length) in file order
+    for name in _COLUMNAR_INT_COLUMNS:
+        yield name, "q", 8, count
+    for name in _COLUMNAR_FLAG_COLUMNS:
+        yield name, "b", 1, count
+    yield "str_off", "I", 4, 2 * count + 1
+
+
+def _columnar_encode(items: dict, fetched_at: float) -> bytes:
+    rows = []
+    for aid, arr in items.items():
+        try:
+            rows.append((int(aid), arr or []))
+        except (TypeError, ValueError):
+            continue
+    rows.sort(key=lambda r: r[0])
+    cols = {name: array("q") for name in _COLUMNAR_INT_COLUMNS}
+    cols.update({name: array("b") for name in _COLUMNAR_FLAG_COLUMNS})
+    str_off = array("I", [0])
+    strings = bytearray()
+    for aid, arr in rows:
+        cols["asset_id"].append(aid)
+        for name, idx in _COLUMNAR_ROW_FIELDS:
+            v = _column_int(arr, idx)
+            if name in _COLUMNAR_FLAG_COLUMNS:
+                v = max(-128, min(127, v))
+            cols[name].append(v)
+        for idx in (0, 1):
+            text = arr[idx] if len(arr) > idx and isinstance(arr[idx], str) else ""
+            strings += text.encode("utf-8")
+            str_off.append(len(strings))
+    out = bytearray(_COLUMNAR_HEADER.pack(_COLUMNAR_MAGIC, _COLUMNAR_VERSION, 0,
+                                          len(rows), len(strings), float(fetched_at)))
+    out += bytes(_COLUMNAR_HEADER_SIZE - len(out))
+    for col in [cols[n] for n in _COLUMNAR_INT_COLUMNS + _COLUMNAR_FLAG_COLUMNS] + [str_off]:
+        if sys.byteorder != "little":
+            col.byteswap()
+        out += col.tobytes()
+    out += strings
+    return bytes(out)
+
+
+class ColumnarSnapshot(Mapping):
+    """
+    Read-only itemdetails snapshot backed by the columnar cache file.
+    Behaves like the Rolimon's dict (str assetId -> row list); rows are
+    materialized on access, and ItemValueIndex reads the columns directly.
+    """
+
+    def __init__(self, buf, fetched_at: float, count: int, strings_len: int):
+        self._buf = buf
+        self.fetched_at = fetched_at
+        self._count = count
+        view = memoryview(buf)
+        self._views = [view]
+        self.columns: Dict[str, memoryview] = {}
+        pos = _COLUMNAR_HEADER_SIZE
+        for name, code, size, n in _columnar_layout(count):
+            col = view[pos:pos + size * n].cast(code)
+            self._views.append(col)
+            self.columns[name] = col
+            pos += size * n
+        self._strings = view[pos:pos + strings_len]
+        self._views.append(self._strings)
+        self._rows: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def open(cls, path: str) -> Optional["ColumnarSnapshot"]:
+        try:
+            with open(path, "rb") as f:
+                try:
+                    buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (ValueError, OSError):
+                    buf = f.read()  # empty file or no mmap support
+        except OSError:
+            return None
+        if len(buf) < _COLUMNAR_HEADER_SIZE:
+            return None
+        magic, version, _, count, strings_len, fetched_at = _COLUMNAR_HEADER.unpack_from(buf, 0)
+        expected = _COLUMNAR_HEADER_SIZE + strings_len + sum(size * n for _, _, size, n in _columnar_layout(count))
+        if magic != _COLUMNAR_MAGIC or version != _COLUMNAR_VERSION or len(buf) < expected:
+            return None
+        if sys.byteorder != "little":
+            # Columns are stored little-endian; copy once on big-endian hosts
+            buf = bytearray(buf[:expected])
+            pos = _COLUMNAR_HEADER_SIZE
+            for _, code, size, n in _columnar_layout(count):
+                if size > 1:
+                    col = array(code, bytes(buf[pos:pos + size * n]))
+                    col.byteswap()
+                    buf[pos:pos + size * n] = col.tobytes()
+                pos += size * n
+        return cls(buf, fetched_at, count, strings_len)
+
+    def close(self):
+        for v in reversed(self._views):
+            v.release()
+        self._views = []
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+
+    def _row_map(self) -> Dict[str, int]:
+        if self._rows is None:
+            self._rows = {str(aid): i for i, aid in enumerate(self.columns["asset_id"])}
+        return self._rows
+
+    def _text(self, slot: int) -> str:
+        off = self.columns["str_off"]
+        return bytes(self._strings[off[slot]:off[slot + 1]]).decode("utf-8")
+
+    def row(self, i: int) -> list:
+        c = self.columns
+        return [self._text(2 * i), self._text(2 * i + 1),
+                c["rap"][i], c["value"][i], c["default"][i], c["demand"][i],
+                c["trend"][i], c["projected"][i], c["hyped"][i], c["rare"][i]]
+
+    def __getitem__(self, asset_id) -> list:
+        return self.row(self._row_map()[str(asset_id)])
+
+    def __contains__(self, asset_id) -> bool:
+        return str(asset_id) in self._row_map()
+
+    def __iter__(self):
+        return iter(self._row_map())
+
+    def __len__(self) -> int:
+        return self._count
+
+    def to_dict(self) -> dict:
+        return {aid: self.row(i) for aid, i in self._row_map().items()}
+
+
+def _save_columnar(path: str, items: dict, fetched_at: float):
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(prefix="rolimons_", suffix=".bin", dir=str(p.parent))
+        with os.fdopen(fd, "wb") as f:
+            f.write(_columnar_encode(items, fetched_at))
+        # os.replace leaves readers of the old mapping untouched on POSIX;
+        # on Windows a mapped target can't be replaced, so keep the old file
+        os.replace(tmp, p)
+    except OSError as e:
+        print(f"Could not write price cache {p}: {e}")
+    finally:
+        try:
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+        except Exception:
+            pass
+
+def export_price_cache_json(path: str = None) -> bool:
+    """Write the current snapshot in the original JSON layout (for debugging)."""
+    items, fetched_at = (_item_values, _item_values_fetched_at) if _item_values else _load_cache_from_disk()
+    if not items:
+        print("No price snapshot to export.")
+        return False
+    if isinstance(items, ColumnarSnapshot):
+        items = items.to_dict()
+    _safe_write_json_atomic(path or PRICE_CACHE_FILE, {"items": items, "fetched_at": fetched_at})
+    return True
+
+def import_price_cache_json(path: str = None) -> bool:
+    """Rebuild the columnar cache from a JSON snapshot."""
+    data = _safe_read_json(path or PRICE_CACHE_FILE)
+    if not data or "items" not in data or "fetched_at" not in data:
+        print(f"No usable JSON price snapshot at {path or PRICE_CACHE_FILE}.")
+        return False
+    _save_columnar(PRICE_CACHE_BIN_FILE, data["items"], float(data["fetched_at"]))
+    return True
+
 def _load_cache_from_disk():
+    if PRICE_CACHE_FORMAT == "columnar":
+        snap = ColumnarSnapshot.open(PRICE_CACHE_BIN_FILE)
+        if snap is not None and len(snap):
+            return snap, snap.fetched_at
     data = _safe_read_json(PRICE_CACHE_FILE)
     if not data or "items" not in data or "fetched_at" not in data:
         return {}, 0.0
+    if PRICE_CACHE_FORMAT == "columnar":
+        # one-time migration from the JSON cache
+        _save_columnar(PRICE_CACHE_BIN_FILE, data["items"], float(data["fetched_at"]))
     return data["items"], float(data["fetched_at"])
 
 def _save_cache_to_disk(items: dict):
+    if PRICE_CACHE_FORMAT == "columnar":
+        _save_columnar(PRICE_CACHE_BIN_FILE, items, time.time())
+        return
     payload = {"items": items, "fetched_at": time.time()}
     _safe_write_json_atomic(PRICE_CACHE_FILE, payload)
 
@@ -102,12 +354,42 @@ def _should_refresh(now: float) -> bool:
         return (now - _last_refresh_attempt) > PRICE_CACHE_MIN_INTERVAL
     return False
 
+def _refresh_snapshot(now: float) -> bool:
+    """
+    Fetch a new snapshot and swap it in together with its value index, then
+    publish what changed on snapshot_events. The last-good snapshot stays on failure.
+    """
+    global _item_values, _item_values_fetched_at, _last_refresh_attempt, _value_index, _previous_index
+    _last_refresh_attempt = now
+    fresh = fetch_item_values_http()
+    if not fresh:
+        return False
+    index = ItemValueIndex(fresh)
+    fetched_at = time.time()
+    if PRICE_CACHE_ENABLED:
+        _save_cache_to_disk(fresh)
+    # readers take a single reference to _item_values, so rebinding is the swap
+    with _snapshot_lock:
+        previous = _item_values
+        old_index = _value_index if _value_index is not None and _value_index.source is previous else None
+        _item_values = fresh
+        _item_values_fetched_at = fetched_at
+        _previous_index, _value_index = old_index, index
+    if previous:
+        diff = diff_value_indexes(old_index or ItemValueIndex(previous), index)
+        print(f"{medium_gray}[Cache] Snapshot diff: {len(diff.value_changed)} value change(s), "
+              f"{len(diff.newly_projected)} newly projected, {len(diff.newly_valued)} newly valued.{RESET_COLOR}")
+        snapshot_events.publish(diff)
+    return True
+
 def get_item_values_cached(ensure_ids: List[int] = None, force_refresh: bool = False) -> dict:
     """
     Returns the in-memory snapshot, refreshing from disk or HTTP if needed.
     ensure_ids: if any not present and policy allows, do a one-off refresh.
+    With the background refresher running, refreshes are handed to it and
+    the last-good snapshot is returned without waiting.
     """
-    global _item_values, _item_values_fetched_at, _last_refresh_attempt
+    global _item_values, _item_values_fetched_at
 
     now = time.time()
 
@@ -128,13 +410,10 @@ def get_item_values_cached(ensure_ids: List[int] = None, force_refresh: bool = F
             need_refresh = True
 
     if need_refresh:
-        _last_refresh_attempt = now
-        fresh = fetch_item_values_http()
-        if fresh:
-            _item_values = fresh
-            _item_values_fetched_at = time.time()
-            if PRICE_CACHE_ENABLED:
-                _save_cache_to_disk(_item_values)
+        if price_refresher.running and _item_values:
+            price_refresher.wake()
+        else:
+            _refresh_snapshot(now)
         # if HTTP failed, keep using the last-good in-memory/disk snapshot
 
     return _item_values
@@ -142,6 +421,57 @@ def get_item_values_cached(ensure_ids: List[int] = None, force_refresh: bool = F
 def values_snapshot_age_seconds() -> int:
     return int(time.time() - _item_values_fetched_at) if _item_values_fetched_at else -1
 
+class PriceRefresher:
+    """
+    Keeps the Rolimon's snapshot fresh from a background thread. It polls the
+    TTL on its own and can be woken early by get_item_values_cached(); the new
+    snapshot (and its value index) is built here and swapped in whole.
+    """
+
+    def __init__(self, poll_secs: float = None):
+        self.poll_secs = poll_secs if poll_secs is not None else PRICE_CACHE_POLL_SECS
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def wake(self):
+        self._wake.set()
+
+    def start(self):
+        if self._thread or not PRICE_CACHE_ENABLED or not PRICE_CACHE_BACKGROUND:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="price-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            woken = self._wake.wait(self.poll_secs)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            now = time.time()
+            # wake-ups still honour the minimum interval between attempts
+            if not (_should_refresh(now) or (woken and now - _last_refresh_attempt > PRICE_CACHE_MIN_INTERVAL)):
+                continue
+            try:
+                if _refresh_snapshot(now):
+                    print(f"{medium_gray}[Cache] Background refresh swapped in a new Rolimon's snapshot.{RESET_COLOR}")
+            except Exception as e:
+                print(f"{soft_red}[Cache] Background refresh failed: {e}{RESET_COLOR}")
+
+_snapshot_lock = threading.Lock()
+price_refresher = PriceRefresher()
+
 # Owner tracking constants
 ROLIMONS_ITEM_URL = "https://www.rolimons.com/item/{asset_id}"
 TABLE_ID = "bc_owners_table"  # per your HTML
@@ -164,6 +494,9 @@ OUTPUT_CSV = config['owner_tracking']['output_csv']
 STOP_WHEN_OLDER = config['owner_tracking']['stop_when_older']
 FLUSH_PER_PAGE = config['owner_tracking']['flush_per_page']
 ASSUME_SORTED = config['owner_tracking']['assume_sorted']
+# after the last owner, wait for the next price snapshot and go over the owners
+# without a sent trade again; evaluations the diff didn't touch are reused
+OWNER_TRACKING_RESCAN = bool(config['owner_tracking'].get('rescan_after_refresh', True))
 
 # Processed owners tracking
 PROCESSED_OWNERS_FILE = "processed_owners.txt"
@@ -175,10 +508,11 @@ FAST_MODE = config['speed']['fast_mode']                 # master switch for spe
 FAST_DISABLE_IMAGES = config['speed']['fast_disable_images']       # speeds up rendering; safe (we click DOM, not images)
 IMPLICIT_WAIT_SECS = config['speed']['implicit_wait_secs']
 PAGE_CHANGE_TIMEOUT = config['speed']['page_change_timeout']
-MUTATION_POLL_MS = config['speed']['mutation_poll_ms']
+MUTATION_POLL_MS = config['speed']['mutation_poll_ms']           # in-page backstop re-check while observing DOM changes
 HUMAN_DELAY_MIN = config['speed']['human_delay_min']
 HUMAN_DELAY_MAX = config['speed']['human_delay_max']
 MAX_PAGES_SCAN = config['speed']['max_pages_scan']             # max "next" clicks per panel
+SELECT_BY_SEARCH = config['speed'].get('select_by_search', True)  # jump to items via the panel's search box before paging
 
 # =====================
 # CONFIG (yours)
@@ -188,15 +522,76 @@ RAP_TIERS = sorted(config['rap_tiers'], key=lambda t: t.get('min_value', 0))
 
 MIN_ITEM_VALUE = config['limits'].get('min_item_value', 1000)
 
-def get_tier_for_rap(rap_value):
-    """Get the appropriate tier for a given RAP value."""
-    for tier in RAP_TIERS:
+def _scan_tiers(tiers, rap_value):
+    """Reference lookup: first tier whose [min_value, max_value] holds rap_value, else the highest."""
+    for tier in tiers:
         min_val = tier.get('min_value', 0)
         max_val = tier.get('max_value', float('inf'))
         if min_val <= rap_value <= max_val:
             return tier
     # If no tier matches, return the last one (highest tier)
-    return RAP_TIERS[-1] if RAP_TIERS else None
+    return tiers[-1] if tiers else None
+
+class TierTable:
+    """
+    RAP_TIERS compiled once for lookup. Every tier boundary goes into a
+    sorted `points` array; slot 0 is below the first point, slot 2i+1 is
+    exactly points[i] and slot 2i+2 the open gap after it. Each slot holds
+    the tier _scan_tiers would pick there, with its gain multipliers.
+    """
+
+    def __init__(self, tiers):
+        self.tiers = list(tiers)
+        self.points = sorted({float(t.get('min_value', 0)) for t in self.tiers}
+                             | {float(t.get('max_value', float('inf'))) for t in self.tiers})
+        reps = [self.points[0] - 1] if self.points else [0.0]
+        for i, p in enumerate(self.points):
+            nxt = self.points[i + 1] if i + 1 < len(self.points) else float('inf')
+            reps += [p, (p + nxt) / 2 if nxt != float('inf') else p + 1]
+        self.slots = [_scan_tiers(self.tiers, rep) for rep in reps]
+        self.min_gain = [t['min_gain_percent'] if t else float('nan') for t in self.slots]
+        self.max_gain = [t['max_gain_percent'] if t else float('nan') for t in self.slots]
+        if np is not None:
+            self._np_points = np.array(self.points, dtype=np.float64)
+            self._np_min = np.array(self.min_gain, dtype=np.float64)
+            self._np_max = np.array(self.max_gain, dtype=np.float64)
+
+    def slot(self, rap_value) -> int:
+        i = bisect_left(self.points, rap_value)
+        return 2 * i + (1 if i < len(self.points) and self.points[i] == rap_value else 0)
+
+    def tier(self, rap_value) -> Optional[dict]:
+        return self.slots[self.slot(rap_value)]
+
+    def gain_bounds(self, offer_totals):
+        """
+        Batch: per-offer (min, max) RAP gain, NaN where no tier applies.
+        NumPy arrays in and out when NumPy is available, lists otherwise.
+        """
+        if np is None:
+            slots = [self.slot(t) for t in offer_totals]
+            return ([t * self.min_gain[k] for t, k in zip(offer_totals, slots)],
+                    [t * self.max_gain[k] for t, k in zip(offer_totals, slots)])
+        totals = np.asarray(offer_totals)
+        i = np.searchsorted(self._np_points, totals, side='left')
+        exact = (i < len(self.points)) & (self._np_points[np.minimum(i, len(self.points) - 1)] == totals) \
+            if self.points else np.zeros(len(totals), dtype=bool)
+        slots = 2 * i + exact
+        return totals * self._np_min[slots], totals * self._np_max[slots]
+
+    def windows(self, offer_totals):
+        """Batch: per-offer (lo, hi) range of ask totals calculate_rap_gain accepts."""
+        lo, hi = self.gain_bounds(offer_totals)
+        if np is None:
+            return [t + g for t, g in zip(offer_totals, lo)], [t + g for t, g in zip(offer_totals, hi)]
+        totals = np.asarray(offer_totals)
+        return totals + lo, totals + hi
+
+TIER_TABLE = TierTable(RAP_TIERS)
+
+def get_tier_for_rap(rap_value):
+    """Get the appropriate tier for a given RAP value."""
+    return TIER_TABLE.tier(rap_value)
 
 UPGRADE_TO_VALUED_ONLY = config['trading_preferences']['upgrade_to_valued_only']
 VALUED_PREMIUM_MIN_PERCENT = config['trading_preferences']['valued_premium_min_percent']
@@ -224,6 +619,327 @@ trade_check_url_template = "https://trades.roblox.com/v1/users/{}/can-trade-with
 rolimons_api_url = "https://www.rolimons.com/itemapi/itemdetails"
 user_ids_api_url = "https://api.rolimons.com/tradeads/v1/getrecentads"
 
+# =====================
+# Rate limiting (token bucket per endpoint family)
+# =====================
+RATE_LIMITS = config.get("rate_limits", {})
+# requests/second and burst size per endpoint family; rate_limits.<endpoint> overrides
+_DEFAULT_RATE_LIMITS = {
+    "inventory":      {"rate": 3.0, "burst": 6},
+    "can_trade":      {"rate": 3.0, "burst": 6},
+    "rolimons_items": {"rate": 0.2, "burst": 1},
+    "trade_ads":      {"rate": 4.0 if FAST_MODE else 1.0, "burst": 1},
+    "trade_send":     {"rate": 0.5, "burst": 2},
+}
+RATE_LIMIT_FLOOR = float(RATE_LIMITS.get("min_rate_fraction", 0.1))  # lowest rate after repeated 429s
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. A 429 halves the rate (down to a floor) and
+    blocks the bucket for Retry-After; each success creeps the rate back up.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _take(self) -> float:
+        """Takes a token and returns 0, or returns how long to wait before trying again."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self.blocked_until - now
+            if wait > 0:
+                return wait
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        wait = self._take()
+        while wait > 0:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def acquire_async(self):
+        wait = self._take()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._take()
+
+    def throttled(self, retry_after: Optional[float] = None):
+        with self._lock:
+            now = time.monotonic()
+            self.rate = max(self.max_rate * RATE_LIMIT_FLOOR, self.rate / 2)
+            self.tokens = 0.0
+            self.updated = now
+            self.blocked_until = max(self.blocked_until, now + (retry_after if retry_after else 1.0 / self.rate))
+
+    def succeeded(self):
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+class RateLimiter:
+    """One TokenBucket per endpoint family; endpoints without a bucket are not limited."""
+
+    def __init__(self, limits: Dict[str, dict]):
+        self.buckets = {name: TokenBucket(spec.get("rate", 1.0), spec.get("burst", 1))
+                        for name, spec in limits.items() if spec and spec.get("rate", 0) > 0}
+
+    def acquire(self, endpoint: str):
+        bucket = self.buckets.get(endpoint)
+        if bucket:
+            bucket.acquire()
+
+    async def acquire_async(self, endpoint: str):
+        bucket = self.buckets.get(endpoint)
+        if bucket:
+            await bucket.acquire_async()
+
+    def throttled(self, endpoint: str, retry_after: Optional[float] = None):
+        bucket = self.buckets.get(endpoint)
+        if bucket:
+            bucket.throttled(retry_after)
+
+    def succeeded(self, endpoint: str):
+        bucket = self.buckets.get(endpoint)
+        if bucket:
+            bucket.succeeded()
+
+def _parse_retry_after(value) -> Optional[float]:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None  # HTTP-date form: fall back to the bucket's own pacing
+
+rate_limiter = RateLimiter({name: {**spec, **RATE_LIMITS.get(name, {})}
+                            for name, spec in _DEFAULT_RATE_LIMITS.items()})
+
+# =====================
+# HTTP client (pooled, retrying)
+# =====================
+HTTP = config.get("http", {})
+HTTP_RETRIES = int(HTTP.get("retries", 3))
+HTTP_BACKOFF_BASE = float(HTTP.get("backoff_base_secs", 0.5))
+HTTP_BACKOFF_MAX = float(HTTP.get("backoff_max_secs", 8.0))
+HTTP_POOL_SIZE = int(HTTP.get("pool_size", 16))
+# e.g. {"inventory.roblox.com": "http://127.0.0.1:8000"} to point an upstream at a local stub
+HTTP_HOST_OVERRIDES = HTTP.get("host_overrides", {})
+
+# Per-endpoint timeouts (seconds); http.timeouts.<endpoint> overrides
+_DEFAULT_TIMEOUTS = {
+    "inventory":      10 if FAST_MODE else 20,
+    "can_trade":      8 if FAST_MODE else 15,
+    "rolimons_items": 10 if FAST_MODE else 20,
+    "trade_ads":      8 if FAST_MODE else 20,
+    "trade_send":     10 if FAST_MODE else 20,
+    "two_step":       8 if FAST_MODE else 15,
+}
+HTTP_TIMEOUTS = {**_DEFAULT_TIMEOUTS, **{k: float(v) for k, v in HTTP.get("timeouts", {}).items()}}
+
+class _HttpPolicy:
+    """Retry/backoff, rate limiting, host overrides and auth shared by the sync and async clients."""
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, retries: int = HTTP_RETRIES, backoff_base: float = HTTP_BACKOFF_BASE,
+                 backoff_max: float = HTTP_BACKOFF_MAX, pool_size: int = HTTP_POOL_SIZE,
+                 host_overrides: Dict[str, str] = None, limiter: RateLimiter = None, cookie: str = None):
+        self.retries = max(0, retries)
+        self.limiter = limiter if limiter is not None else rate_limiter
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.host_overrides = dict(host_overrides if host_overrides is not None else HTTP_HOST_OVERRIDES)
+        self.cookie = COOKIE_VALUE if cookie is None else cookie
+        self._auth_headers = {'Cookie': f'.ROBLOSECURITY={self.cookie}'}
+
+    def _resolve(self, url: str) -> Tuple[str, str]:
+        parts = urlsplit(url)
+        base = self.host_overrides.get(parts.netloc)
+        if base:
+            b = urlsplit(base)
+            url = urlunsplit((b.scheme, b.netloc, parts.path, parts.query, parts.fragment))
+            return url, b.netloc
+        return url, parts.netloc
+
+    def backoff_delay(self, attempt: int, retry_after=None) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except (TypeError, ValueError):
+                pass
+        # full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+class HttpClient(_HttpPolicy):
+    """
+    One keep-alive requests.Session per upstream host, shared by every caller
+    (and thread). Every attempt first takes a token from the endpoint's rate
+    limiter bucket. Connection errors and 5xx are retried with jittered
+    exponential backoff; a 429 slows the endpoint's bucket (honouring
+    Retry-After) before retrying.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _session(self, host: str) -> requests.Session:
+        with self._lock:
+            s = self._sessions.get(host)
+            if s is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                self._sessions[host] = s
+            return s
+
+    def get(self, endpoint: str, url: str, params=None, auth: bool = False,
+            headers: Dict[str, str] = None) -> requests.Response:
+        """
+        GET with the endpoint's timeout. Returns the last response (callers
+        still raise_for_status); raises only if every attempt failed to connect.
+        """
+        url, host = self._resolve(url)
+        session = self._session(host)
+        if auth:
+            headers = {**self._auth_headers, **(headers or {})}
+        timeout = HTTP_TIMEOUTS.get(endpoint, 10 if FAST_MODE else 20)
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire(endpoint)
+            try:
+                r = session.get(url, params=params, headers=headers, timeout=timeout)
+            except requests.RequestException:
+                if attempt >= self.retries:
+                    raise
+                time.sleep(self.backoff_delay(attempt))
+                continue
+            if r.status_code == 429:
+                # the bucket does the waiting; every caller of this endpoint slows down together
+                self.limiter.throttled(endpoint, _parse_retry_after(r.headers.get('Retry-After')))
+                if attempt < self.retries:
+                    continue
+            elif r.status_code in self.RETRY_STATUSES and attempt < self.retries:
+                time.sleep(self.backoff_delay(attempt, r.headers.get('Retry-After')))
+                continue
+            elif r.status_code < 400:
+                self.limiter.succeeded(endpoint)
+            return r
+
+    def post(self, endpoint: str, url: str, json=None, auth: bool = False,
+             headers: Dict[str, str] = None) -> requests.Response:
+        """
+        One POST with the endpoint's timeout, after a rate-limiter token.
+        Not retried: a POST may have taken effect even when the reply is lost,
+        so callers decide what is safe to repeat. A 429 still slows the bucket.
+        """
+        url, host = self._resolve(url)
+        if auth:
+            headers = {**self._auth_headers, **(headers or {})}
+        self.limiter.acquire(endpoint)
+        r = self._session(host).post(url, json=json, headers=headers,
+                                     timeout=HTTP_TIMEOUTS.get(endpoint, 10 if FAST_MODE else 20))
+        if r.status_code == 429:
+            self.limiter.throttled(endpoint, _parse_retry_after(r.headers.get('Retry-After')))
+        elif r.status_code < 400:
+            self.limiter.succeeded(endpoint)
+        return r
+
+    def close(self):
+        with self._lock:
+            for s in self._sessions.values():
+                s.close()
+            self._sessions.clear()
+
+http_client = HttpClient()
+
+def set_http_client(client: HttpClient):
+    """Swap the shared client (e.g. one pointed at a local stub server)."""
+    global http_client
+    http_client = client
+
+# Async twin of the client, for high-volume runs (needs aiohttp)
+HTTP_ASYNC_MAX_IN_FLIGHT = int(HTTP.get("async_max_in_flight", 100))
+
+class AsyncHttpClient(_HttpPolicy):
+    """
+    asyncio counterpart of HttpClient: same retries, rate limiter, timeouts and
+    host overrides, over one aiohttp session with at most max_in_flight
+    requests outstanding. Use as `async with AsyncHttpClient() as client:`.
+    """
+
+    def __init__(self, max_in_flight: int = HTTP_ASYNC_MAX_IN_FLIGHT, **kwargs):
+        super().__init__(**kwargs)
+        self.max_in_flight = max(1, max_in_flight)
+        self._session = None
+        self._slots = None
+
+    async def __aenter__(self):
+        if aiohttp is None:
+            raise RuntimeError("aiohttp is required for the async network layer (pip install aiohttp).")
+        self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.max_in_flight))
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_json(self, endpoint: str, url: str, params=None, auth: bool = False,
+                       headers: Dict[str, str] = None, response_headers: dict = None):
+        """
+        (status, parsed JSON or None for error statuses). Raises only if every
+        attempt failed to connect or time out. response_headers, if given,
+        receives the last response's headers.
+        """
+        url, _ = self._resolve(url)
+        if auth:
+            headers = {**self._auth_headers, **(headers or {})}
+        timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUTS.get(endpoint, 10 if FAST_MODE else 20))
+        for attempt in range(self.retries + 1):
+            await self.limiter.acquire_async(endpoint)
+            try:
+                async with self._slots:
+                    async with self._session.get(url, params=params, headers=headers, timeout=timeout) as r:
+                        status, retry_after = r.status, r.headers.get('Retry-After')
+                        if response_headers is not None:
+                            response_headers.clear()
+                            response_headers.update(r.headers)
+                        data = await r.json(content_type=None) if status < 400 else None
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt >= self.retries:
+                    raise
+                await asyncio.sleep(self.backoff_delay(attempt))
+                continue
+            if status == 429:
+                self.limiter.throttled(endpoint, _parse_retry_after(retry_after))
+                if attempt < self.retries:
+                    continue
+            elif status in self.RETRY_STATUSES and attempt < self.retries:
+                await asyncio.sleep(self.backoff_delay(attempt, retry_after))
+                continue
+            elif status < 400:
+                self.limiter.succeeded(endpoint)
+            return status, data
+
 # Console colors - Standard ANSI colors for UI compatibility
 light_gray = "\033[37m"    # White (bright)
 medium_gray = "\033[90m"   # Bright black (gray)
@@ -254,6 +970,7 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver import ActionChains
+from selenium.common.exceptions import WebDriverException
 
 from collections import Counter
 
@@ -267,10 +984,41 @@ def _count_by_asset_id(items):
         c[str(it["assetId"])] += 1
     return dict(c)
 
+def _names_by_asset_id(items):
+    """items: list of dicts with 'assetId' and 'name'. Returns dict[str assetId] -> name."""
+    return {str(it["assetId"]): it["name"] for it in items if it.get("name")}
+
+# observeUntil(root, test, timeoutMs, pollMs, done) calls done(true) as soon
+# as test() holds -- checked at once, after every DOM mutation under root and
+# every pollMs as a backstop -- or done(false) after timeoutMs. Run inside
+# execute_async_script, a whole wait costs one WebDriver round trip.
+_OBSERVE_JS = """
+function observeUntil(root, test, timeoutMs, pollMs, done) {
+  let finished = false, observer = null, timer = null, poll = null;
+  const finish = (ok) => {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    clearInterval(poll);
+    done(ok);
+  };
+  const check = () => {
+    try { if (test()) finish(true); } catch (e) { finish(false); }
+  };
+  observer = new MutationObserver(check);
+  observer.observe(root || document.documentElement, {childList: true, subtree: true, characterData: true,
+                                                      attributes: true, attributeFilter: ['thumbnail-target-id']});
+  timer = setTimeout(() => finish(false), timeoutMs);
+  poll = setInterval(check, pollMs);
+  check();
+}
+"""
+
 def _human_pause():
     time.sleep(random.uniform(HUMAN_DELAY_MIN, HUMAN_DELAY_MAX))
 
-def build_driver():
+def build_driver(use_profile: bool = USE_EXISTING_CHROME_PROFILE):
     opts = Options()
     if HEADLESS:
         opts.add_argument("--headless=new")
@@ -294,7 +1042,7 @@ def build_driver():
     except Exception:
         pass
 
-    if USE_EXISTING_CHROME_PROFILE:
+    if use_profile:
         opts.add_argument(f"--user-data-dir={CHROME_USER_DATA_DIR}")
         opts.add_argument(f"--profile-directory={CHROME_PROFILE_NAME}")
 
@@ -317,17 +1065,21 @@ def build_driver():
     driver.implicitly_wait(IMPLICIT_WAIT_SECS)
     return driver
 
-def ensure_logged_in(driver):
-    driver.get("https://www.roblox.com/home")
-    _human_pause()
-    if USE_EXISTING_CHROME_PROFILE:
+def ensure_logged_in(driver, cookie: str = None):
+    """Logs the driver in with `cookie` (default: ours), unless it runs on the existing Chrome profile."""
+    if cookie is None and USE_EXISTING_CHROME_PROFILE:
+        driver.get("https://www.roblox.com/home")
+        _human_pause()
         return
-    if not COOKIE_VALUE:
+    cookie = cookie or COOKIE_VALUE
+    if not cookie:
         raise RuntimeError("Missing ROBLOSECURITY cookie. Set env var ROBLOSECURITY.")
+    # cookies can only be set on a roblox.com page; robots.txt is the cheapest one
+    driver.get("https://www.roblox.com/robots.txt")
     driver.delete_all_cookies()
     driver.add_cookie({
         "name": ".ROBLOSECURITY",
-        "value": COOKIE_VALUE,
+        "value": cookie,
         "domain": ".roblox.com",
         "path": "/",
         "httpOnly": True,
@@ -337,6 +1089,164 @@ def ensure_logged_in(driver):
     driver.get("https://www.roblox.com/home")
     _human_pause()
 
+# =====================
+# Driver pool
+# =====================
+# Logged-in Chrome sessions are expensive to start (cold launch, cookie
+# injection, home page loads), so they are kept warm and shared by the owner
+# scraper and the trade sender. A session is health-checked when handed out
+# and replaced after selenium.max_driver_uses sends or as soon as it breaks.
+DRIVER_POOL_SIZE = int(config['selenium'].get('pool_size', 1))
+DRIVER_MAX_USES = int(config['selenium'].get('max_driver_uses', 200))
+
+class DriverPool:
+    """
+    Up to `size` warm drivers. `with pool.session() as driver:` borrows one,
+    blocking while all are busy; a WebDriverException inside the block
+    retires the driver and is re-raised.
+    """
+
+    def __init__(self, size: int = DRIVER_POOL_SIZE, max_uses: int = DRIVER_MAX_USES, factory=None,
+                 cookie: str = None):
+        # another account's pool logs in with its own cookie, never on our Chrome profile
+        self.cookie = cookie
+        self._profile = USE_EXISTING_CHROME_PROFILE and cookie is None
+        if self._profile and size > 1:
+            # Chrome locks a user-data-dir to one instance
+            print(f"{medium_gray}[Drivers] Existing Chrome profile in use; pool limited to 1 driver.{RESET_COLOR}")
+            size = 1
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.factory = factory or self._new_driver
+        self._idle = deque()          # [driver, uses]
+        self._count = 0               # idle + borrowed + being built
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def _new_driver(self):
+        driver = build_driver(use_profile=self._profile)
+        try:
+            ensure_logged_in(driver, self.cookie)
+        except Exception:
+            _quit_driver(driver)
+            raise
+        return driver
+
+    def _healthy(self, driver) -> bool:
+        try:
+            if driver.execute_script("return document.readyState") is None:
+                return False
+            if self._profile:
+                return True
+            # get_cookie only sees the current page's domain, and the scraper
+            # leaves drivers on rolimons.com; come back to roblox.com to look
+            host = urlsplit(driver.current_url).hostname or ""
+            if not (host == "roblox.com" or host.endswith(".roblox.com")):
+                driver.get("https://www.roblox.com/robots.txt")
+            return driver.get_cookie(".ROBLOSECURITY") is not None
+        except Exception:
+            return False
+
+    def warm(self, n: int = None):
+        """Starts drivers (in parallel) until n, default all `size`, exist."""
+        with self._cond:
+            n = min(self.size, self.size if n is None else n) - self._count
+            if n <= 0 or self._closed:
+                return
+            self._count += n
+        with ThreadPoolExecutor(max_workers=n) as ex:
+            futures = [ex.submit(self.factory) for _ in range(n)]
+        started = 0
+        for fut in futures:
+            try:
+                self._put(fut.result(), 0)
+                started += 1
+            except Exception as e:
+                print(f"{soft_red}[Drivers] Could not start a driver: {e}{RESET_COLOR}")
+                self._discard(None)
+        if started:
+            print(f"{medium_gray}[Drivers] Started {started} warm driver(s).{RESET_COLOR}")
+
+    def _put(self, driver, uses: int):
+        with self._cond:
+            closed = self._closed
+            if closed:
+                self._count -= 1
+            else:
+                self._idle.append([driver, uses])
+            self._cond.notify()
+        if closed:
+            _quit_driver(driver)
+
+    def _discard(self, driver):
+        if driver is not None:
+            _quit_driver(driver)
+        with self._cond:
+            self._count -= 1
+            self._cond.notify()
+
+    def acquire(self):
+        """A healthy driver and its use count; builds one if the pool isn't full yet."""
+        while True:
+            with self._cond:
+                while not self._idle and self._count >= self.size and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    raise RuntimeError("driver pool is closed")
+                entry = self._idle.popleft() if self._idle else None
+                if entry is None:
+                    self._count += 1
+            if entry is None:
+                try:
+                    return self.factory(), 0
+                except Exception:
+                    self._discard(None)
+                    raise
+            driver, uses = entry
+            if uses < self.max_uses and self._healthy(driver):
+                return driver, uses
+            print(f"{medium_gray}[Drivers] Dropping an unresponsive driver.{RESET_COLOR}")
+            self._discard(driver)
+
+    def release(self, driver, uses: int, broken: bool = False):
+        uses += 1
+        if broken or uses >= self.max_uses:
+            self._discard(driver)
+            # rebuild in the background so the next borrower finds a warm one
+            threading.Thread(target=self.warm, daemon=True).start()
+        else:
+            self._put(driver, uses)
+
+    @contextmanager
+    def session(self):
+        driver, uses = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(driver, uses, broken)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle = [d for d, _ in self._idle]
+            self._idle.clear()
+            self._count -= len(idle)
+            self._cond.notify_all()
+        for driver in idle:
+            _quit_driver(driver)
+
+def _quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+driver_pool = DriverPool()
+
 # =====================
 # 2FA helpers
 # =====================
@@ -351,6 +1261,23 @@ def generate_totp(secret_base32: str, interval: int = 30, digits: int = 6) -> st
     code = (struct.unpack(">I", h[o:o+4])[0] & 0x7fffffff) % (10 ** digits)
     return str(code).zfill(digits)
 
+def two_step_code(attempt: int, max_attempts: int, secret: str = None) -> str:
+    """A 6-digit code from the TOTP secret (default: ours), else asked for on the console. "" if invalid."""
+    if secret is None:
+        secret = config['user']['totp_secret'] or os.getenv("ROBLOX_TOTP_SECRET", "").strip()
+    if secret:
+        code = generate_totp(secret)
+        print(f"{white}[2FA] Using TOTP (attempt {attempt}/{max_attempts}).{RESET_COLOR}")
+    else:
+        try:
+            code = input("Enter 6-digit Roblox 2FA code: ").strip()
+        except Exception:
+            code = ""
+    if not (code and code.isdigit() and len(code) == 6):
+        print(f"{soft_red}[2FA] Invalid code; must be 6 digits.{RESET_COLOR}")
+        return ""
+    return code
+
 
 # =====================
 # Owner tracking helpers
@@ -398,21 +1325,30 @@ def click_premium_copies_if_present(driver, verbose=False):
         print("[tab] Premium Copies not found (likely already there).")
 
 
+_FIRST_ROW_SIG_JS = """
+function firstRowSig(tableId) {
+  const row = document.querySelector('table#' + tableId + ' tbody tr');
+  return row ? (row.innerText || '').trim() : '';
+}
+"""
+
 def table_first_row_sig(driver) -> str:
     try:
-        first = driver.find_elements(By.CSS_SELECTOR, f"table#{TABLE_ID} tbody tr")[0]
-        return first.text
+        return driver.execute_script(_FIRST_ROW_SIG_JS + "return firstRowSig(arguments[0]);", TABLE_ID) or ""
     except Exception:
         return ""
 
 
 def wait_for_redraw(driver, old_sig: str, timeout=6) -> bool:
-    end = time.time() + timeout
-    while time.time() < end:
-        if table_first_row_sig(driver) != old_sig:
-            return True
-        time.sleep(0.12)
-    return False
+    """Waits for the owners table's first row to differ from old_sig (a table_first_row_sig())."""
+    try:
+        return bool(driver.execute_async_script(_OBSERVE_JS + _FIRST_ROW_SIG_JS + """
+            const [tableId, oldSig, timeoutMs, pollMs, done] = arguments;
+            observeUntil(document.getElementById(tableId), () => firstRowSig(tableId) !== oldSig,
+                         timeoutMs, pollMs, done);
+        """, TABLE_ID, old_sig, int(timeout * 1000), MUTATION_POLL_MS))
+    except Exception:
+        return False
 
 
 def set_page_size(driver, size=100, verbose=False):
@@ -428,7 +1364,6 @@ def set_page_size(driver, size=100, verbose=False):
                 s.value = arguments[1];
                 s.dispatchEvent(new Event('change', {bubbles:true}));
             """, select, str(size))
-        time.sleep(0.5)
         if not wait_for_redraw(driver, old, timeout=6) and verbose:
             print("[page-size] Redraw not detected (may already match).")
         elif verbose:
@@ -467,7 +1402,6 @@ def click_next(driver, verbose=False) -> bool:
                 a.click()
             except Exception:
                 driver.execute_script("arguments[0].click();", a)
-            time.sleep(0.35)
             if wait_for_redraw(driver, sig_before, timeout=6):
                 if verbose:
                     print("[paginate] Next -> page changed.")
@@ -511,10 +1445,12 @@ def load_processed_owners() -> Set[int]:
     return processed
 
 
+_processed_owners_lock = threading.Lock()
+
 def save_processed_owner(owner_id: int):
-    """Save a processed owner to file."""
+    """Save a processed owner to file (safe to call from several send threads)."""
     try:
-        with open(PROCESSED_OWNERS_FILE, "a", encoding="utf-8") as f:
+        with _processed_owners_lock, open(PROCESSED_OWNERS_FILE, "a", encoding="utf-8") as f:
             f.write(f"{owner_id}\n")
     except Exception:
         pass
@@ -601,7 +1537,7 @@ def scrape_owners(driver, asset_id: int, min_days: float, max_days: float,
 
     return collected
 
-def maybe_handle_two_step_verification(driver, max_attempts: int = 3) -> bool:
+def maybe_handle_two_step_verification(driver, max_attempts: int = 3, totp_secret: str = None) -> bool:
     try:
         WebDriverWait(driver, 2 if FAST_MODE else 3).until(
             EC.presence_of_element_located((By.ID, "two-step-verification-code-input"))
@@ -609,17 +1545,8 @@ def maybe_handle_two_step_verification(driver, max_attempts: int = 3) -> bool:
     except Exception:
         return True  # no 2FA
     for attempt in range(1, max_attempts + 1):
-        secret = config['user']['totp_secret'] or os.getenv("ROBLOX_TOTP_SECRET", "").strip()
-        if secret:
-            code = generate_totp(secret)
-            print(f"{white}[2FA] Using TOTP (attempt {attempt}/{max_attempts}).{RESET_COLOR}")
-        else:
-            try:
-                code = input("Enter 6-digit Roblox 2FA code: ").strip()
-            except Exception:
-                code = ""
-        if not (code and code.isdigit() and len(code) == 6):
-            print(f"{soft_red}[2FA] Invalid code; must be 6 digits.{RESET_COLOR}")
+        code = two_step_code(attempt, max_attempts, totp_secret)
+        if not code:
             continue
         try:
             box = driver.find_element(By.ID, "two-step-verification-code-input")
@@ -646,18 +1573,15 @@ def maybe_handle_two_step_verification(driver, max_attempts: int = 3) -> bool:
                 verify_btn.click()
             except Exception:
                 driver.execute_script("arguments[0].click();", verify_btn)
-            # Quick poll for disappearance
-            end = time.time() + (2.5 if FAST_MODE else 8)
-            ok = False
-            while time.time() < end:
-                try:
-                    if not driver.find_elements(By.ID, "two-step-verification-code-input"):
-                        ok = True
-                        break
-                except Exception:
-                    ok = True
-                    break
-                time.sleep(0.12 if FAST_MODE else 0.25)
+            # Wait for the code input to go away
+            try:
+                ok = bool(driver.execute_async_script(_OBSERVE_JS + """
+                    const [timeoutMs, pollMs, done] = arguments;
+                    observeUntil(document.body, () => !document.getElementById('two-step-verification-code-input'),
+                                 timeoutMs, pollMs, done);
+                """, int((2.5 if FAST_MODE else 8) * 1000), MUTATION_POLL_MS))
+            except Exception:
+                ok = True  # the page navigated away mid-wait: the modal is gone
             if ok:
                 print(f"{soft_green}[2FA] Verified.{RESET_COLOR}")
                 return True
@@ -669,44 +1593,199 @@ def maybe_handle_two_step_verification(driver, max_attempts: int = 3) -> bool:
 # =====================
 # Helpers for value/RAP logic
 # =====================
-def fetch_item_values():
-    try:
-        response = requests.get(rolimons_api_url, timeout=10 if FAST_MODE else 20)
-        response.raise_for_status()
-        data = response.json()
-        return data['items']
-    except requests.RequestException:
-        return {}
+PROJECTED_IDX = 7  # Rolimon's itemdetails: [name, acronym, rap, value, defaultValue, demand, trend, projected, hyped, rare]
+
+class ItemValueIndex:
+    """
+    Compact per-snapshot view of Rolimon's itemdetails: assetId -> row number
+    into parallel value / rap / projected / valued arrays. Built once per
+    snapshot; item annotations are kept in a side table of this index, so
+    the finders never touch the raw dict and an item dict shared by threads
+    reads the same values for as long as a caller holds the same snapshot.
+    """
+    __slots__ = ("source", "version", "_rows", "value", "rap", "projected", "valued", "_notes")
+
+    _versions = 0
+
+    def __init__(self, item_values: dict):
+        ItemValueIndex._versions += 1
+        self.source = item_values
+        self.version = ItemValueIndex._versions
+        self._rows: Dict[int, int] = {}
+        self.value: List[int] = []
+        self.rap: List[int] = []
+        self.projected: List[bool] = []
+        self.valued: List[bool] = []
+        self._notes: Dict[Tuple[int, int], Tuple[int, int, bool]] = {}
+        if isinstance(item_values, ColumnarSnapshot):
+            # columns are already typed; no per-row parsing
+            cols = item_values.columns
+            self._rows = {aid: i for i, aid in enumerate(cols["asset_id"])}
+            self.value = cols["value"].tolist()
+            self.rap = cols["rap"].tolist()
+            self.projected = [f == 1 for f in cols["projected"]]
+            self.valued = [v != -1 for v in self.value]
+            return
+        for aid, arr in item_values.items():
+            try:
+                key = int(aid)
+            except (TypeError, ValueError):
+                continue
+            if not arr:
+                continue
+            value = arr[3] if len(arr) > 3 else -1
+            # Rolimon's uses 1 for true, -1 for false (or sometimes 0/None when absent)
+            try:
+                flag = int(arr[PROJECTED_IDX]) if len(arr) > PROJECTED_IDX and arr[PROJECTED_IDX] is not None else -1
+            except Exception:
+                flag = -1
+            self._rows[key] = len(self.value)
+            self.value.append(value)
+            self.rap.append(arr[2] if len(arr) > 2 else -1)
+            self.projected.append(flag == 1)
+            self.valued.append(value != -1)
+
+    def __len__(self):
+        return len(self.value)
+
+    def row(self, asset_id) -> Optional[int]:
+        try:
+            return self._rows.get(int(asset_id))
+        except (TypeError, ValueError):
+            return None
+
+    def annotate(self, item: dict) -> Tuple[int, int, bool]:
+        """(Rolimon's value or -1, value used for trading, projected) of an inventory item in this snapshot."""
+        rap = item.get('recentAveragePrice', 0) or 0
+        key = (item['assetId'], rap)
+        note = self._notes.get(key)
+        if note is None:
+            row = self.row(item['assetId'])
+            rolimons = self.value[row] if row is not None and self.valued[row] else -1
+            # If we didn't get Rolimon's row for this item, follow your preference:
+            projected = self.projected[row] if row is not None else bool(PROJECTED_UNKNOWN_IS_PROJECTED)
+            note = self._notes[key] = (rolimons, rolimons if rolimons != -1 else rap, projected)
+        return note
+
+_value_index: Optional[ItemValueIndex] = None
+_previous_index: Optional[ItemValueIndex] = None  # callers may still hold the pre-swap snapshot
+
+def value_index(item_values: dict) -> ItemValueIndex:
+    """Index for this snapshot dict, rebuilt only when the snapshot object changes."""
+    global _value_index, _previous_index
+    with _snapshot_lock:
+        if _value_index is not None and _value_index.source is item_values:
+            return _value_index
+        if _previous_index is not None and _previous_index.source is item_values:
+            return _previous_index
+        _previous_index, _value_index = _value_index, ItemValueIndex(item_values)
+        return _value_index
+
+def _annotated(item, item_values) -> Tuple[int, int, bool]:
+    return value_index(item_values).annotate(item)
+
+def annotate_inventory(inv: List[dict], item_values: dict) -> List[dict]:
+    """Warm this snapshot's annotations for a freshly fetched inventory."""
+    index = value_index(item_values)
+    for it in inv:
+        index.annotate(it)
+    return inv
+
+class SnapshotDiff(NamedTuple):
+    """What moved between two price snapshots (asset ids), as seen by the finders."""
+    old_version: int
+    new_version: int
+    value_changed: frozenset
+    newly_projected: frozenset
+    no_longer_projected: frozenset
+    newly_valued: frozenset
+    no_longer_valued: frozenset
+    added: frozenset
+    removed: frozenset
+
+    def changed(self) -> Set[int]:
+        return (self.value_changed | self.newly_projected | self.no_longer_projected
+                | self.newly_valued | self.no_longer_valued | self.added | self.removed)
+
+def diff_value_indexes(old: ItemValueIndex, new: ItemValueIndex) -> SnapshotDiff:
+    value_changed, newly_projected, no_longer_projected = set(), set(), set()
+    newly_valued, no_longer_valued = set(), set()
+    for aid, j in new._rows.items():
+        i = old._rows.get(aid)
+        if i is None:
+            continue
+        if old.valued[i] != new.valued[j]:
+            (newly_valued if new.valued[j] else no_longer_valued).add(aid)
+        elif old.valued[i] and old.value[i] != new.value[j]:
+            value_changed.add(aid)
+        if old.projected[i] != new.projected[j]:
+            (newly_projected if new.projected[j] else no_longer_projected).add(aid)
+    return SnapshotDiff(old.version, new.version, frozenset(value_changed),
+                        frozenset(newly_projected), frozenset(no_longer_projected),
+                        frozenset(newly_valued), frozenset(no_longer_valued),
+                        frozenset(new._rows.keys() - old._rows.keys()),
+                        frozenset(old._rows.keys() - new._rows.keys()))
+
+class SnapshotEvents:
+    """
+    Stream of SnapshotDiffs published on every snapshot swap. Subscribers are
+    called on the refreshing thread; changed_since() answers "which items
+    moved after version v" from the recent history.
+    """
+
+    def __init__(self, history: int = 16):
+        self._history: deque = deque(maxlen=history)
+        self._subscribers: List = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def publish(self, diff: SnapshotDiff):
+        with self._lock:
+            self._history.append(diff)
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(diff)
+            except Exception as e:
+                print(f"Snapshot subscriber failed: {e}")
+
+    def changed_since(self, version: int, current: int) -> Optional[Set[int]]:
+        """Union of changes from version up to current; None if the history doesn't reach back."""
+        changed: Set[int] = set()
+        with self._lock:
+            by_old = {d.old_version: d for d in self._history}
+        while version != current:
+            diff = by_old.get(version)
+            if diff is None:
+                return None
+            changed |= diff.changed()
+            version = diff.new_version
+        return changed
+
+snapshot_events = SnapshotEvents()
 
 def rolimons_value(item, item_values):
-    iid = str(item['assetId'])
-    if iid in item_values and item_values[iid][3] != -1:
-        return item_values[iid][3]
-    return -1
+    return _annotated(item, item_values)[0]
 
 def get_item_value(item, item_values):
-    val = rolimons_value(item, item_values)
-    return val if val != -1 else item.get('recentAveragePrice', 0) or 0
+    return _annotated(item, item_values)[1]
 
 def is_valued(item, item_values):
-    return rolimons_value(item, item_values) != -1
+    return _annotated(item, item_values)[0] != -1
 
 def is_rap_only(item, item_values):
-    return rolimons_value(item, item_values) == -1
-
-PROJECTED_IDX = 7  # Rolimon's itemdetails: [name, acronym, rap, value, defaultValue, demand, trend, projected, hyped, rare]
+    return _annotated(item, item_values)[0] == -1
 
 def is_projected(item, item_values) -> bool:
-    arr = item_values.get(str(item['assetId']))
-    if not arr:
-        # If we didn't get Rolimon's row for this item, follow your preference:
-        return bool(PROJECTED_UNKNOWN_IS_PROJECTED)
-    # Rolimon's uses 1 for true, -1 for false (or sometimes 0/None when absent)
-    try:
-        flag = int(arr[PROJECTED_IDX]) if len(arr) > PROJECTED_IDX and arr[PROJECTED_IDX] is not None else -1
-    except Exception:
-        flag = -1
-    return flag == 1
+    return _annotated(item, item_values)[2]
 
 def drop_projecteds(inv: List[dict], item_values: dict, for_offer_side: bool) -> List[dict]:
     """
@@ -727,58 +1806,926 @@ def drop_projecteds(inv: List[dict], item_values: dict, for_offer_side: bool) ->
 # =====================
 # Inventory + users
 # =====================
-def fetch_limiteds(user_id):
+INVENTORY = config.get("inventory", {})
+INVENTORY_MAX_PAGES = int(INVENTORY.get("max_pages", 50))
+# Stop paging a counterparty once this many items worth >= MIN_ITEM_VALUE are in hand.
+# Pages come back in acquisition order, not by value, so anything but 0 (read
+# every page, the default) can hide the items the finders would have picked.
+INVENTORY_STOP_AFTER = int(INVENTORY.get("stop_after_high_value") or 0)
+
+INVENTORY_CACHE = config.get("inventory_cache", {})
+INVENTORY_CACHE_ENABLED = bool(INVENTORY_CACHE.get("enabled", True))
+INVENTORY_CACHE_TTL = int(INVENTORY_CACHE.get("ttl_seconds", 300))
+INVENTORY_CACHE_MAX_ENTRIES = int(INVENTORY_CACHE.get("max_entries", 2000))
+INVENTORY_CACHE_DIR = INVENTORY_CACHE.get("dir", "cache/inventories") if INVENTORY_CACHE.get("disk", False) else None
+# A trade-ad user without a sent trade is looked at again after this long (0 = never);
+# by then their inventory revalidates cheaply and an unchanged one hits the evaluation memo.
+USER_REVISIT_SECS = int(INVENTORY.get("revisit_after_seconds", INVENTORY_CACHE_TTL))
+
+class InventoryCache:
+    """
+    Per-user inventories with a TTL and LRU eviction, optionally mirrored to
+    one JSON file per user. An entry remembers whether it holds every page or
+    stopped early (and at what stop_after), plus each page's cursor and ETag
+    so a stale entry can be revalidated with conditional requests.
+    """
+
+    def __init__(self, ttl: int = INVENTORY_CACHE_TTL, max_entries: int = INVENTORY_CACHE_MAX_ENTRIES,
+                 disk_dir: Optional[str] = INVENTORY_CACHE_DIR):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self.disk_dir = disk_dir
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, user_id) -> str:
+        return os.path.join(self.disk_dir, f"{int(user_id)}.json")
+
+    def get(self, user_id) -> Optional[dict]:
+        """Entry of any age (memory first, then disk), or None."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+                return entry
+        if not self.disk_dir:
+            return None
+        entry = _safe_read_json(self._path(user_id))
+        if not entry or "items" not in entry:
+            return None
+        self._remember(user_id, entry)
+        return entry
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry["fetched_at"] <= self.ttl
+
+    def put(self, user_id, items: List[dict], complete: bool, stop_after: int, pages: List[list] = None):
+        entry = {
+            "items": [dict(it) for it in items],
+            "fetched_at": time.time(),
+            "complete": bool(complete),
+            "stop_after": int(stop_after or 0),
+            "pages": pages or [],   # [cursor, etag] per page read
+        }
+        self._remember(user_id, entry)
+        if self.disk_dir:
+            _safe_write_json_atomic(self._path(user_id), entry)
+
+    def touch(self, user_id):
+        """Mark an entry as just revalidated."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry["fetched_at"] = time.time()
+        if entry is not None and self.disk_dir:
+            _safe_write_json_atomic(self._path(user_id), entry)
+
+    def invalidate(self, user_id) -> bool:
+        with self._lock:
+            found = self._entries.pop(user_id, None) is not None
+        if self.disk_dir:
+            try:
+                os.remove(self._path(user_id))
+                found = True
+            except OSError:
+                pass
+        return found
+
+    def _remember(self, user_id, entry: dict):
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+inventory_cache = InventoryCache()
+
+def _cache_entry_covers(entry: dict, stop_after: int) -> bool:
+    """Whether an entry holds at least what a fetch with this stop_after would return."""
+    if entry.get("complete"):
+        return True
+    return bool(stop_after) and entry.get("stop_after", 0) >= stop_after
+
+def _parse_limiteds_page(data: dict) -> List[dict]:
+    limiteds = [item for item in data.get('data', []) if not item.get('isOnHold', True)]
+    inv = [{
+        'userAssetId': item['userAssetId'],
+        'assetId': item['assetId'],
+        'name': item['name'],
+        'recentAveragePrice': item.get('recentAveragePrice', 0) or 0,
+    } for item in limiteds]
+    # warm the current snapshot's side table; a newer snapshot annotates lazily
+    if _item_values:
+        annotate_inventory(inv, _item_values)
+    return inv
+
+def counterparty_stop_after() -> int:
+    return int(INVENTORY_STOP_AFTER or 0)
+
+def fetch_limiteds(user_id, stop_after: int = 0, meta: dict = None):
+    """
+    All tradable collectibles of user_id, following nextPageCursor across
+    every inventory page. stop_after > 0 stops paging once that many items are
+    worth >= MIN_ITEM_VALUE. Pages aren't ordered by value, so that can miss
+    the user's best items; it's an opt-in trade of completeness for latency.
+    meta, if given, receives 'pages' ([cursor, etag] per page read), 'complete'
+    once the last page has been read, or 'stopped_early'.
+    """
     api_url = inventory_url_template.format(user_id)
-    try:
-        response = requests.get(api_url, timeout=10 if FAST_MODE else 20)
-        response.raise_for_status()
-        data = response.json()
-        limiteds = [item for item in data.get('data', []) if not item.get('isOnHold', True)]
-        return [{
-            'userAssetId': item['userAssetId'],
-            'assetId': item['assetId'],
-            'name': item['name'],
-            'recentAveragePrice': item.get('recentAveragePrice', 0) or 0,
-        } for item in limiteds]
-    except requests.RequestException:
-        return []
+    inv = []
+    high_value = 0
+    cursor = None
+    for _ in range(INVENTORY_MAX_PAGES):
+        try:
+            r = http_client.get("inventory", api_url, params={'cursor': cursor} if cursor else None)
+            r.raise_for_status()
+            data = r.json()
+        except Exception:
+            break
+        if meta is not None:
+            meta.setdefault('pages', []).append([cursor, r.headers.get('ETag')])
+        page = _parse_limiteds_page(data)
+        inv.extend(page)
+        if stop_after:
+            high_value += sum(1 for it in page if get_item_value(it, _item_values) >= MIN_ITEM_VALUE)
+            if high_value >= stop_after:
+                if meta is not None:
+                    meta['stopped_early'] = True
+                break
+        cursor = data.get('nextPageCursor')
+        if not cursor:
+            if meta is not None:
+                meta['complete'] = True
+            break
+    return inv
+
+def fetch_limiteds_cached(user_id, stop_after: int = 0):
+    """
+    fetch_limiteds through the inventory cache. A stale entry is first
+    revalidated with If-None-Match on every page it holds, when each has an
+    ETag; otherwise, or if any page changed, it is fetched again.
+    """
+    if not INVENTORY_CACHE_ENABLED:
+        return fetch_limiteds(user_id, stop_after=stop_after)
+    entry = inventory_cache.get(user_id)
+    if entry and _cache_entry_covers(entry, stop_after):
+        if inventory_cache.is_fresh(entry):
+            return list(entry["items"])
+        if _revalidatable(entry) and _inventory_unchanged(user_id, entry["pages"]):
+            inventory_cache.touch(user_id)
+            return list(entry["items"])
+    meta = {}
+    inv = fetch_limiteds(user_id, stop_after=stop_after, meta=meta)
+    # a fetch that failed part-way is neither complete nor stopped early: don't cache it
+    if meta.get("complete") or meta.get("stopped_early"):
+        inventory_cache.put(user_id, inv, meta.get("complete", False), stop_after, meta.get("pages"))
+    return inv
+
+def _revalidatable(entry: dict) -> bool:
+    pages = entry.get("pages")
+    return bool(pages) and all(etag for _, etag in pages)
+
+def _inventory_unchanged(user_id, pages: List[list]) -> bool:
+    """True when every cached page still answers 304 Not Modified to its ETag."""
+    api_url = inventory_url_template.format(user_id)
+    for cursor, etag in pages:
+        try:
+            r = http_client.get("inventory", api_url, params={'cursor': cursor} if cursor else None,
+                                headers={'If-None-Match': etag})
+        except Exception:
+            return False
+        if r.status_code != 304:
+            return False
+    return True
 
 def can_trade_with(user_id):
     url = trade_check_url_template.format(user_id)
-    headers = {'Cookie': f'.ROBLOSECURITY={COOKIE_VALUE}'}
     try:
-        response = requests.get(url, headers=headers, timeout=8 if FAST_MODE else 15)
+        response = http_client.get("can_trade", url, auth=True)
         response.raise_for_status()
         data = response.json()
         return data.get('canTrade', False)
     except requests.RequestException:
         return False
 
+class RecentUsers:
+    """Set-like record of user IDs seen in the last `ttl` seconds (ttl <= 0: kept for good)."""
+
+    def __init__(self, ttl: int = USER_REVISIT_SECS):
+        self.ttl = ttl
+        self._seen: Dict[int, float] = {}
+
+    def __contains__(self, user_id) -> bool:
+        ts = self._seen.get(user_id)
+        return ts is not None and (self.ttl <= 0 or time.time() - ts < self.ttl)
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def update(self, user_ids):
+        now = time.time()
+        if self.ttl > 0:
+            self._seen = {uid: ts for uid, ts in self._seen.items() if now - ts < self.ttl}
+        for uid in user_ids:
+            self._seen[uid] = now
+
+def _parse_trade_ads(data: dict, seen_user_ids: set) -> List[int]:
+    if not data or not data.get("success"):
+        return []
+    current_user_ids = [ad[2] for ad in data.get("trade_ads", [])]
+    new_user_ids = [uid for uid in current_user_ids if uid not in seen_user_ids]
+    seen_user_ids.update(new_user_ids)
+    return new_user_ids
+
 def fetch_new_user_ids(seen_user_ids):
     try:
-        response = requests.get(user_ids_api_url, timeout=8 if FAST_MODE else 20)
-        data = response.json()
-        if data.get("success"):
-            current_user_ids = [ad[2] for ad in data.get("trade_ads", [])]
-            new_user_ids = [uid for uid in current_user_ids if uid not in seen_user_ids]
-            seen_user_ids.update(new_user_ids)
-            return new_user_ids
+        response = http_client.get("trade_ads", user_ids_api_url)
+        return _parse_trade_ads(response.json(), seen_user_ids)
+    except Exception:
         return []
+
+# Async variants: same result shapes as the functions above, for use with AsyncHttpClient
+async def can_trade_with_async(client: AsyncHttpClient, user_id) -> bool:
+    try:
+        status, data = await client.get_json("can_trade", trade_check_url_template.format(user_id), auth=True)
+        return bool(data.get('canTrade', False)) if status < 400 and data else False
+    except Exception:
+        return False
+
+async def fetch_limiteds_async(client: AsyncHttpClient, user_id, stop_after: int = 0,
+                               meta: dict = None) -> List[dict]:
+    api_url = inventory_url_template.format(user_id)
+    inv = []
+    high_value = 0
+    cursor = None
+    for _ in range(INVENTORY_MAX_PAGES):
+        headers = {}
+        try:
+            status, data = await client.get_json("inventory", api_url, params={'cursor': cursor} if cursor else None,
+                                                 response_headers=headers)
+        except Exception:
+            break
+        if status >= 400 or not data:
+            break
+        if meta is not None:
+            meta.setdefault('pages', []).append([cursor, headers.get('ETag')])
+        page = _parse_limiteds_page(data)
+        inv.extend(page)
+        if stop_after:
+            high_value += sum(1 for it in page if get_item_value(it, _item_values) >= MIN_ITEM_VALUE)
+            if high_value >= stop_after:
+                if meta is not None:
+                    meta['stopped_early'] = True
+                break
+        cursor = data.get('nextPageCursor')
+        if not cursor:
+            if meta is not None:
+                meta['complete'] = True
+            break
+    return inv
+
+async def fetch_limiteds_cached_async(client: AsyncHttpClient, user_id, stop_after: int = 0) -> List[dict]:
+    """Async twin of fetch_limiteds_cached, revalidating stale entries the same way."""
+    if INVENTORY_CACHE_ENABLED:
+        entry = inventory_cache.get(user_id)
+        if entry and _cache_entry_covers(entry, stop_after):
+            if inventory_cache.is_fresh(entry):
+                return list(entry["items"])
+            if _revalidatable(entry) and await _inventory_unchanged_async(client, user_id, entry["pages"]):
+                inventory_cache.touch(user_id)
+                return list(entry["items"])
+    meta = {}
+    inv = await fetch_limiteds_async(client, user_id, stop_after=stop_after, meta=meta)
+    if INVENTORY_CACHE_ENABLED and (meta.get("complete") or meta.get("stopped_early")):
+        inventory_cache.put(user_id, inv, meta.get("complete", False), stop_after, meta.get("pages"))
+    return inv
+
+async def _inventory_unchanged_async(client: AsyncHttpClient, user_id, pages: List[list]) -> bool:
+    api_url = inventory_url_template.format(user_id)
+    for cursor, etag in pages:
+        try:
+            status, _ = await client.get_json("inventory", api_url, params={'cursor': cursor} if cursor else None,
+                                              headers={'If-None-Match': etag})
+        except Exception:
+            return False
+        if status != 304:
+            return False
+    return True
+
+async def fetch_new_user_ids_async(client: AsyncHttpClient, seen_user_ids) -> List[int]:
+    try:
+        _, data = await client.get_json("trade_ads", user_ids_api_url)
+        return _parse_trade_ads(data, seen_user_ids)
     except Exception:
         return []
 
+# =====================
+# Own inventory
+# =====================
+SELF_INVENTORY = config.get("self_inventory", {})
+SELF_INVENTORY_REFRESH_SECS = int(SELF_INVENTORY.get("refresh_seconds", 300))
+# how long items stay reserved after an offer goes out (we can't see declines/expiry)
+SELF_INVENTORY_COMMIT_TTL = int(SELF_INVENTORY.get("commit_ttl_seconds", 86400))
+
+class SelfInventory:
+    """
+    Our own tradable items. Sorted by value once per price snapshot (and per
+    change), minus the userAssetIds already committed to outbound offers,
+    which are reserved when a trade is matched rather than once it is sent.
+    refresh() re-reads the API; start() does that on a background schedule.
+    """
+
+    def __init__(self, user_id, refresh_secs: int = SELF_INVENTORY_REFRESH_SECS,
+                 commit_ttl: int = SELF_INVENTORY_COMMIT_TTL):
+        self.user_id = user_id
+        self.refresh_secs = refresh_secs
+        self.commit_ttl = commit_ttl
+        self._items: List[dict] = []
+        self._committed: Dict[int, float] = {}   # userAssetId -> committed at
+        self._generation = 0
+        self._sorted_key = None
+        self._sorted: List[dict] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self) -> bool:
+        """Re-fetch every page; keeps the previous items if the fetch failed."""
+        meta = {}
+        items = fetch_limiteds(self.user_id, meta=meta)
+        if not meta.get("complete"):
+            return False
+        items = [item for item in items if item['assetId'] not in ITEMS_I_WANT_TO_KEEP]
+        with self._lock:
+            self._items = items
+            held = {it['userAssetId'] for it in items}
+            # items that left the inventory no longer need a reservation
+            self._committed = {uaid: ts for uaid, ts in self._committed.items() if uaid in held}
+            self._generation += 1
+        return True
+
+    def reserve(self, items: List[dict]) -> bool:
+        """
+        Reserve items for an offer about to go out. False, reserving nothing,
+        if another offer already holds any of them.
+        """
+        now = time.time()
+        with self._lock:
+            if any(it['userAssetId'] in self._committed for it in items):
+                return False
+            for it in items:
+                self._committed[it['userAssetId']] = now
+            self._generation += 1
+        return True
+
+    def release(self, items: List[dict]):
+        """Hand back items reserved for an offer that didn't go out."""
+        with self._lock:
+            for it in items:
+                self._committed.pop(it['userAssetId'], None)
+            self._generation += 1
+
+    def _expire_commitments(self, now: float):
+        expired = [uaid for uaid, ts in self._committed.items() if now - ts > self.commit_ttl]
+        for uaid in expired:
+            del self._committed[uaid]
+        if expired:
+            self._generation += 1
+
+    def available(self) -> List[dict]:
+        """Uncommitted items, highest value first. Callers must not mutate the list."""
+        with self._lock:
+            self._expire_commitments(time.time())
+            index = value_index(_item_values)
+            key = (index.version, self._generation)
+            if key != self._sorted_key:
+                self._sorted = sorted((it for it in self._items if it['userAssetId'] not in self._committed),
+                                      key=lambda it: get_item_value(it, _item_values), reverse=True)
+                self._sorted_key = key
+            return self._sorted
+
+    def committed_count(self) -> int:
+        with self._lock:
+            return len(self._committed)
+
+    def start(self):
+        if self._thread or self.refresh_secs <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="self-inventory", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_secs):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"{soft_red}[Inventory] Background refresh failed: {e}{RESET_COLOR}")
+
 # =====================
 # RAP gain rules
 # =====================
 def calculate_rap_gain(your_total_rap, their_total_rap):
     rap_difference = their_total_rap - your_total_rap
-    tier = get_tier_for_rap(your_total_rap)
-    if not tier:
+    slot = TIER_TABLE.slot(your_total_rap)
+    if not TIER_TABLE.slots[slot]:
         return False
-    rap_gain_min = your_total_rap * tier['min_gain_percent']
-    rap_gain_max = your_total_rap * tier['max_gain_percent']
+    rap_gain_min = your_total_rap * TIER_TABLE.min_gain[slot]
+    rap_gain_max = your_total_rap * TIER_TABLE.max_gain[slot]
     return rap_gain_min <= rap_difference <= rap_gain_max
 
+# =====================
+# Trade search engine (meet-in-the-middle)
+# =====================
+# Rather than pairing every offer combo with every ask combo, all ask-side
+# subset sums are computed once per counterparty and sorted by total. Each
+# offer combo then binary-searches the window of ask totals it would accept.
+# With NumPy available, a whole block of offer combos is instead checked
+# against every ask subset of a size in one array operation.
+SEARCH = config.get("search", {})
+SEARCH_POOL_SIZE = int(SEARCH.get("pool_size", 10))
+VALUED_POOL_SIZE = int(SEARCH.get("valued_pool_size", max(SEARCH_POOL_SIZE, 12)))
+SEARCH_VECTORIZED = bool(SEARCH.get("vectorized", True)) and np is not None
+SEARCH_VECTOR_CELLS = int(SEARCH.get("vector_chunk_cells", 1 << 21))  # offer x ask pairings per array op
+# "first": each finder returns the first acceptable trade (legacy order).
+# "best_first": branch-and-bound over offer combos by gain bound, best trade by score.
+SEARCH_STRATEGY = SEARCH.get("strategy", "first")
+SEARCH_SCORE = SEARCH.get("score", "rap_gain")       # or "gain_percent"
+# Anytime search: per-finder deadline and cap on window lookups; 0 -> unlimited.
+# When either is set the finders run best-first and return the best found so far.
+SEARCH_BUDGET_MS = float(SEARCH.get("budget_ms", 0))
+SEARCH_MAX_EVALS = int(SEARCH.get("max_evals", 0))
+
+class TradeRule(NamedTuple):
+    """
+    How an (offer total, ask total) pairing is judged:
+      kind      -> 'tier' (calculate_rap_gain) or 'valued' (premium bounds)
+      direction -> +1 their total must exceed ours, -1 it must be below ours
+      cheaper   -> every requested item must be worth less than our offer total
+    """
+    kind: str
+    direction: int = 1
+    cheaper: bool = False
+
+RULE_TIER_UP = TradeRule('tier', 1)
+RULE_TIER_DOWN = TradeRule('tier', -1)
+RULE_TIER_SPLIT = TradeRule('tier', 1, cheaper=True)
+RULE_VALUED = TradeRule('valued', 1)
+
+def subset_levels(values: List[int], max_size: int, labels=None):
+    """
+    Yield (size, rows) for size = 1..max_size, where rows holds every
+    size-item combination of range(len(values)) in combinations() order as
+    (combo, total, max value). Each level extends the previous one by one
+    item, so a row costs one addition and one comparison rather than a fresh
+    sum over the combo. labels maps the indices placed in combos.
+    """
+    n = len(values)
+    if labels is None:
+        labels = range(n)
+    after = {label: pos + 1 for pos, label in enumerate(labels)}
+    level = [((labels[i],), values[i], values[i]) for i in range(n)]
+    for size in range(1, min(n, max_size) + 1):
+        if size > 1:
+            level = [(combo + (labels[i],), total + values[i], top if top >= values[i] else values[i])
+                     for combo, total, top in level
+                     for i in range(after[combo[-1]], n)]
+        yield size, level
+
+def subsets_of_size(values: List[int], size: int, labels=None):
+    """Every size-item combination as (combo, total, max value); see subset_levels."""
+    for level_size, rows in subset_levels(values, size, labels):
+        if level_size == size:
+            return rows
+    return []
+
+class SubsetSums:
+    """
+    Every subset (up to max_size items) of a candidate pool, grouped by size
+    and sorted by total value. Combos are tuples of indices into `pool`;
+    maxes holds each combo's most valuable item.
+    """
+    __slots__ = ("pool", "values", "totals", "combos", "maxes", "_arrays")
+
+    def __init__(self, pool: List[dict], values: List[int], max_size: int):
+        self.pool = pool
+        self.values = values
+        self.totals: Dict[int, List[int]] = {}
+        self.combos: Dict[int, List[Tuple[int, ...]]] = {}
+        self.maxes: Dict[int, List[int]] = {}
+        self._arrays = {}
+        for size, rows in subset_levels(values, max_size):
+            rows = sorted(rows, key=itemgetter(1, 0))  # by total, then combo
+            self.combos[size] = [row[0] for row in rows]
+            self.totals[size] = [row[1] for row in rows]
+            self.maxes[size] = [row[2] for row in rows]
+
+    def sizes(self) -> List[int]:
+        return sorted(self.totals)
+
+    def items(self, combo) -> List[dict]:
+        return [self.pool[i] for i in combo]
+
+    def arrays(self, size):
+        """(totals, max item value) for one subset size as NumPy arrays."""
+        if size not in self._arrays:
+            self._arrays[size] = (np.array(self.totals[size], dtype=np.int64),
+                                  np.array(self.maxes[size], dtype=np.int64))
+        return self._arrays[size]
+
+    def best_in_window(self, sizes, lo, hi, accept):
+        """
+        Highest (total, combo) with lo <= total <= hi, over the given sizes,
+        for which accept(total, max item value) holds. None if nothing qualifies.
+        """
+        best = None
+        for size in sizes:
+            totals = self.totals.get(size)
+            if not totals:
+                continue
+            combos, maxes = self.combos[size], self.maxes[size]
+            start = bisect_left(totals, lo)
+            for k in range(bisect_right(totals, hi) - 1, start - 1, -1):
+                if best is not None and totals[k] <= best[0]:
+                    break
+                if accept(totals[k], maxes[k]):
+                    best = (totals[k], combos[k])
+                    break
+        return best
+
+def rap_gain_window(your_total_rap):
+    """(lo, hi) range of their totals that calculate_rap_gain accepts, or None."""
+    slot = TIER_TABLE.slot(your_total_rap)
+    if not TIER_TABLE.slots[slot]:
+        return None
+    return (your_total_rap + your_total_rap * TIER_TABLE.min_gain[slot],
+            your_total_rap + your_total_rap * TIER_TABLE.max_gain[slot])
+
+def _rule_window(rule: TradeRule, offer_total):
+    if rule.kind == 'valued':
+        if offer_total <= 0:
+            return None
+        return (offer_total * (1 + VALUED_PREMIUM_MIN_PERCENT),
+                offer_total * (1 + VALUED_PREMIUM_MAX_PERCENT))
+    return rap_gain_window(offer_total)
+
+def _rule_accepts(rule: TradeRule, offer_total, ask_total, ask_max) -> bool:
+    if rule.direction > 0 and ask_total <= offer_total:
+        return False
+    if rule.direction < 0 and ask_total >= offer_total:
+        return False
+    if rule.cheaper and ask_max >= offer_total:
+        return False
+    if rule.kind == 'valued':
+        return within_valued_premium_bounds(offer_total, ask_total)
+    return calculate_rap_gain(offer_total, ask_total)
+
+def _rule_mask(rule: TradeRule, offer_totals, bounds, ask_totals, ask_max):
+    """Acceptance matrix (offers x asks) mirroring _rule_accepts."""
+    offer_col = offer_totals[:, None]
+    diff = ask_totals[None, :] - offer_col
+    if rule.kind == 'valued':
+        with np.errstate(divide='ignore', invalid='ignore'):
+            premium = diff / offer_col.astype(np.float64)
+        mask = (offer_col > 0) & (VALUED_PREMIUM_MIN_PERCENT <= premium) & (premium <= VALUED_PREMIUM_MAX_PERCENT)
+    else:
+        mask = (bounds[0][:, None] <= diff) & (diff <= bounds[1][:, None])
+    mask &= (diff > 0) if rule.direction > 0 else (diff < 0)
+    if rule.cheaper:
+        mask &= ask_max[None, :] < offer_col
+    return mask
+
+def _np_best_asks(rule: TradeRule, offer_totals, bounds, ask_totals, ask_max):
+    """
+    Per offer, index of the highest accepted ask total (asks are sorted
+    ascending) or -1. Offers are processed in blocks of SEARCH_VECTOR_CELLS.
+    """
+    best = np.full(len(offer_totals), -1, dtype=np.int64)
+    if not len(ask_totals):
+        return best
+    step = max(1, SEARCH_VECTOR_CELLS // len(ask_totals))
+    for start in range(0, len(offer_totals), step):
+        part = slice(start, start + step)
+        part_bounds = (bounds[0][part], bounds[1][part]) if bounds else None
+        mask = _rule_mask(rule, offer_totals[part], part_bounds, ask_totals, ask_max)
+        last = mask.shape[1] - 1 - np.argmax(mask[:, ::-1], axis=1)
+        best[part] = np.where(mask.any(axis=1), last, -1)
+    return best
+
+def _group_by_offer_size(entries):
+    grouped: Dict[int, List[Tuple[int, TradeRule]]] = {}
+    for r, s, rule in entries:
+        grouped.setdefault(r, []).append((s, rule))
+    return sorted(grouped.items())
+
+def _run_phase(your_vals, asks: SubsetSums, entries, pick, budget: "SearchBudget" = None):
+    """
+    Scalar backend. entries: (offer size, ask size, rule) triples.
+    pick='first' stops at the first offer combo (by size, then pool order)
+    with any accepted ask; pick='best' keeps the highest gain overall.
+    Window lookups are counted in budget.evals.
+    Returns (offer combo, ask total, ask combo) or None.
+    """
+    best = None
+    grouped = dict(_group_by_offer_size(entries))
+    for r, offers in subset_levels(your_vals, max(grouped, default=0)):
+        pairs = grouped.get(r)
+        if not pairs:
+            continue
+        for offer, offer_total, _ in offers:
+            found = None
+            for s, rule in pairs:
+                window = _rule_window(rule, offer_total)
+                if not window:
+                    continue
+                if budget is not None:
+                    budget.evals += 1
+                # +-1 absorbs float rounding; _rule_accepts applies the exact rule
+                hit = asks.best_in_window(
+                    [s], window[0] - 1, window[1] + 1,
+                    lambda total, top: _rule_accepts(rule, offer_total, total, top),
+                )
+                if hit and (found is None or hit[0] > found[0]):
+                    found = hit
+            if not found:
+                continue
+            if pick == 'first':
+                return offer, found[0], found[1]
+            if best is None or found[0] - offer_total > best[0]:
+                best = (found[0] - offer_total, offer, found)
+    return (best[1], best[2][0], best[2][1]) if best else None
+
+def _run_phase_np(your_vals, asks: SubsetSums, entries, pick, budget: "SearchBudget" = None):
+    """Vectorized backend for _run_phase; same inputs and result. Every offer counts as one lookup per ask size."""
+    vals = np.array(your_vals, dtype=np.int64)
+    best = None
+    for r, pairs in _group_by_offer_size(entries):
+        offers = np.array(list(combinations(range(len(your_vals)), r)), dtype=np.intp).reshape(-1, r)
+        if not len(offers):
+            continue
+        offer_totals = vals[offers].sum(axis=1)
+        tier_bounds = TIER_TABLE.gain_bounds(offer_totals) if any(rule.kind == 'tier' for _, rule in pairs) else None
+        hit_total = np.full(len(offers), -1, dtype=np.int64)
+        hit_size = np.zeros(len(offers), dtype=np.int64)
+        hit_k = np.full(len(offers), -1, dtype=np.int64)
+        for s, rule in pairs:
+            if s not in asks.totals:
+                continue
+            ask_totals, ask_max = asks.arrays(s)
+            if budget is not None:
+                budget.evals += len(offers)
+            k = _np_best_asks(rule, offer_totals, tier_bounds if rule.kind == 'tier' else None, ask_totals, ask_max)
+            totals = np.where(k >= 0, ask_totals[np.maximum(k, 0)], -1)
+            better = (k >= 0) & ((hit_k < 0) | (totals > hit_total))
+            hit_total = np.where(better, totals, hit_total)
+            hit_size = np.where(better, s, hit_size)
+            hit_k = np.where(better, k, hit_k)
+        found = np.flatnonzero(hit_k >= 0)
+        if not len(found):
+            continue
+        if pick == 'first':
+            o = int(found[0])
+        else:
+            gains = hit_total[found] - offer_totals[found]
+            o = int(found[int(np.argmax(gains))])
+            if best is not None and int(hit_total[o] - offer_totals[o]) <= best[0]:
+                continue
+        result = (tuple(int(i) for i in offers[o]), int(hit_total[o]),
+                  asks.combos[int(hit_size[o])][int(hit_k[o])])
+        if pick == 'first':
+            return result
+        best = (int(hit_total[o] - offer_totals[o]), result)
+    return best[1] if best else None
+
+def trade_score(gain, offer_total) -> float:
+    """Ranking used by the best-first search (search.score)."""
+    if SEARCH_SCORE == "gain_percent":
+        return gain / float(offer_total) if offer_total else float("-inf")
+    return gain
+
+class SearchBudget:
+    """
+    Deadline and evaluation cap shared by the phases of one finder call, plus
+    how much of the branch space ((offer combo, ask size) pairs) was settled:
+    pruned, expanded, or ruled out by the bound.
+    """
+    __slots__ = ("deadline", "max_evals", "evals", "branches", "settled")
+
+    def __init__(self, deadline_ms: float = 0, max_evals: int = 0):
+        self.deadline = time.perf_counter() + deadline_ms / 1000.0 if deadline_ms else None
+        self.max_evals = max_evals or None
+        self.evals = 0
+        self.branches = 0
+        self.settled = 0
+
+    @classmethod
+    def for_call(cls, deadline_ms=None, max_evals=None) -> "SearchBudget":
+        return cls(SEARCH_BUDGET_MS if deadline_ms is None else deadline_ms,
+                   SEARCH_MAX_EVALS if max_evals is None else max_evals)
+
+    @property
+    def limited(self) -> bool:
+        return self.deadline is not None or self.max_evals is not None
+
+    def exhausted(self) -> bool:
+        if self.max_evals is not None and self.evals >= self.max_evals:
+            return True
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+    def report(self, meta: Optional[dict]):
+        if meta is None:
+            return
+        meta["evaluated"] = self.evals
+        meta["branches"] = self.branches
+        meta["coverage"] = self.settled / self.branches if self.branches else 1.0
+        meta["exhausted"] = self.settled < self.branches
+
+def _branch_count(your_vals, asks: SubsetSums, entries) -> int:
+    return sum(comb(len(your_vals), r) for r, s, _ in entries if s in asks.totals)
+
+def _gain_ceiling(rule: TradeRule, lo_total, hi_total) -> Optional[float]:
+    """Largest gain, as a fraction of the offer total, the rule allows for offer totals in [lo_total, hi_total]."""
+    if rule.kind == 'valued':
+        return VALUED_PREMIUM_MAX_PERCENT
+    gains = [g for g in TIER_TABLE.max_gain[TIER_TABLE.slot(lo_total):TIER_TABLE.slot(hi_total) + 1]
+             if g == g]  # NaN: no tier
+    return max(gains) if gains else None
+
+def _score_bound(lo_total, hi_total, ask_max, ceiling, direction) -> float:
+    """
+    Optimistic trade_score for any offer total in [lo_total, hi_total] against
+    asks worth at most ask_max. The +1 matches the slack of the leaf windows.
+    """
+    gain = min(max(lo_total * ceiling, hi_total * ceiling) + 1, ask_max - lo_total)
+    if direction < 0:
+        gain = min(gain, 0)
+    if SEARCH_SCORE == "gain_percent":
+        if lo_total <= 0:
+            return float("inf")
+        return gain / float(lo_total if gain >= 0 else hi_total)
+    return gain
+
+def _run_phase_top(your_vals, asks: SubsetSums, entries, budget: SearchBudget = None):
+    """
+    Best-first branch-and-bound backend. Offer combos grow one item at a time
+    in pool order; a partial combo's bound assumes the cheapest and the
+    dearest completions of its size (suffix sums of the remaining values) and
+    the largest ask total. Complete combos become (offer, ask size, rule)
+    branches bounded by their exact window. Nodes are expanded highest bound
+    first and only when popped, so the search stops as soon as no remaining
+    bound beats the best trade found, or the budget runs out (keeping the
+    best found so far). Returns (offer combo, ask total, ask combo) or None.
+    """
+    budget = budget or SearchBudget()
+    n = len(your_vals)
+    grouped = {r: [(s, rule) for s, rule in pairs if asks.totals.get(s)] for r, pairs in _group_by_offer_size(entries)}
+    grouped = {r: pairs for r, pairs in grouped.items() if pairs}
+    # for bounding, each offer size only needs its rules' largest ask total
+    ask_max: Dict[int, Dict[TradeRule, int]] = {}
+    for r, pairs in grouped.items():
+        for s, rule in pairs:
+            ask_max.setdefault(r, {})[rule] = max(ask_max.get(r, {}).get(rule, 0), asks.totals[s][-1])
+    max_size = min(n, max(grouped, default=0))
+    # cheapest / dearest sum of m items from your_vals[p:]
+    low = [[0] * (max_size + 1) for _ in range(n + 1)]
+    high = [[0] * (max_size + 1) for _ in range(n + 1)]
+    for p in range(n):
+        rest = sorted(your_vals[p:])
+        for m in range(1, min(max_size, n - p) + 1):
+            low[p][m] = low[p][m - 1] + rest[m - 1]
+            high[p][m] = high[p][m - 1] + rest[-m]
+
+    def leaves(size, start):
+        """Branches under a partial combo of `size` items whose next item comes from `start` on."""
+        return sum(comb(n - start, r - size) * len(pairs) for r, pairs in grouped.items() if r >= size)
+
+    def bound(size, start, total):
+        best = None
+        for r, rules in ask_max.items():
+            m = r - size
+            if m < 0 or m > n - start:
+                continue
+            lo_total, hi_total = total + low[start][m], total + high[start][m]
+            for rule, top in rules.items():
+                ceiling = _gain_ceiling(rule, lo_total, hi_total)
+                if ceiling is None:
+                    continue
+                b = _score_bound(lo_total, hi_total, top, ceiling, rule.direction)
+                if best is None or b > best:
+                    best = b
+        return best
+
+    seq = 0
+    frontier = []  # (-bound, seq, branches, node): node is (offer, total) or a branch tuple
+    root_bound = bound(0, 0, 0)
+    if root_bound is None:
+        budget.settled += leaves(0, 0)
+        return None
+    frontier.append((-root_bound, seq, leaves(0, 0), ((), 0)))
+    found = None  # (score, offer, ask total, ask combo)
+    while frontier:
+        if found is not None and -frontier[0][0] <= found[0]:
+            budget.settled += sum(entry[2] for entry in frontier)  # nothing left can beat it
+            break
+        if budget.exhausted():
+            break
+        _, _, branches, node = heapq.heappop(frontier)
+        if len(node) == 2:
+            offer, offer_total = node
+            size, start = len(offer), offer[-1] + 1 if offer else 0
+            for s, rule in grouped.get(size, ()):
+                totals = asks.totals[s]
+                window = _rule_window(rule, offer_total)
+                if not window:
+                    budget.settled += 1
+                    continue
+                lo, hi = window[0] - 1, window[1] + 1
+                top = min(hi, totals[-1])
+                if top < max(lo, totals[0]) or (rule.direction > 0 and top <= offer_total):
+                    budget.settled += 1
+                    continue
+                seq += 1
+                heapq.heappush(frontier, (-trade_score(top - offer_total, offer_total), seq, 1,
+                                          (offer, offer_total, s, rule, lo, hi)))
+            if size >= max_size:
+                continue
+            for i in range(start, n):
+                child, child_total = offer + (i,), offer_total + your_vals[i]
+                child_bound = bound(size + 1, i + 1, child_total)
+                child_branches = leaves(size + 1, i + 1)
+                if child_bound is None or (found is not None and child_bound <= found[0]):
+                    budget.settled += child_branches
+                    continue
+                seq += 1
+                heapq.heappush(frontier, (-child_bound, seq, child_branches, (child, child_total)))
+            continue
+        offer, offer_total, s, rule, lo, hi = node
+        budget.evals += 1
+        budget.settled += 1
+        hit = asks.best_in_window(
+            [s], lo, hi,
+            lambda total, top: _rule_accepts(rule, offer_total, total, top),
+        )
+        if not hit:
+            continue
+        score = trade_score(hit[0] - offer_total, offer_total)
+        if found is None or score > found[0]:
+            found = (score, offer, hit[0], hit[1])
+    return found[1:] if found else None
+
+def _search_phases(your_pool, your_vals, asks: SubsetSums, phases, mode,
+                   budget: SearchBudget = None, meta: Optional[dict] = None):
+    """
+    Run (pick, entries) phases in order; the first phase with a hit decides.
+    Best-first (or any limited budget) returns the best trade found; coverage
+    of the branch space is written to meta.
+    """
+    budget = budget or SearchBudget()
+    budget.branches += sum(_branch_count(your_vals, asks, entries) for _, entries in phases)
+    hits = []
+    if SEARCH_STRATEGY == "best_first" or budget.limited:
+        for n, (_, entries) in enumerate(phases):
+            hit = _run_phase_top(your_vals, asks, entries, budget)
+            if hit:
+                hits = [hit]
+                break
+    else:
+        run = _run_phase_np if SEARCH_VECTORIZED else _run_phase
+        for n, (pick, entries) in enumerate(phases):
+            hit = run(your_vals, asks, entries, pick, budget)
+            # a complete phase settles every branch, whether looked up or decided by the first hit
+            budget.settled += _branch_count(your_vals, asks, entries)
+            if hit:
+                hits = [hit]
+                break
+    if hits:
+        # later phases are never consulted once one has a hit
+        budget.settled += sum(_branch_count(your_vals, asks, entries) for _, entries in phases[n + 1:])
+    budget.report(meta)
+    return [_make_trade([your_pool[i] for i in offer], asks.items(ask),
+                        sum(your_vals[i] for i in offer), ask_total, mode)
+            for offer, ask_total, ask in hits]
+
+def _make_trade(offer_items, ask_items, offer_total, ask_total, mode):
+    return {
+        'items': list(offer_items),
+        'their_items': list(ask_items),
+        'my_total_rap': offer_total,
+        'their_total_rap': ask_total,
+        'rap_gain': ask_total - offer_total,
+        'mode': mode,
+    }
+
+def _sorted_pool(inventory, item_values, size):
+    return sorted(inventory, key=lambda it: get_item_value(it, item_values), reverse=True)[:size]
+
+def _offer_sizes(your_pool):
+    return range(1, min(len(your_pool), MAX_OFFER_ITEMS) + 1)
+
 # =====================
 # NEW: valued-upgrade finder
 # =====================
@@ -788,12 +2735,11 @@ def within_valued_premium_bounds(your_total, their_total):
     premium = (their_total - your_total) / float(your_total)
     return VALUED_PREMIUM_MIN_PERCENT <= premium <= VALUED_PREMIUM_MAX_PERCENT
 
-def find_upgrade_to_valued_trade(your_inventory, their_inventory, item_values):
-    your_sorted = sorted(
-        [i for i in your_inventory if i['assetId'] not in ITEMS_I_WANT_TO_KEEP],
-        key=lambda it: get_item_value(it, item_values), reverse=True
-    )[:12]
-    their_sorted = sorted(their_inventory, key=lambda it: get_item_value(it, item_values), reverse=True)[:12]
+def find_upgrade_to_valued_trade(your_inventory, their_inventory, item_values,
+                                 deadline_ms=None, max_evals=None, meta=None):
+    your_sorted = _sorted_pool([i for i in your_inventory if i['assetId'] not in ITEMS_I_WANT_TO_KEEP],
+                               item_values, VALUED_POOL_SIZE)
+    their_sorted = _sorted_pool(their_inventory, item_values, VALUED_POOL_SIZE)
     your_pool = [i for i in your_sorted if is_rap_only(i, item_values)]
     if AVOID_PROJECTED_OFFER:
         your_pool = [i for i in your_pool if not is_projected(i, item_values)]
@@ -801,161 +2747,370 @@ def find_upgrade_to_valued_trade(your_inventory, their_inventory, item_values):
     if AVOID_PROJECTED:
         their_pool = [i for i in their_pool if not is_projected(i, item_values)]
 
-    best = []
-    seen_offers = set()
-
-    for r in range(1, min(len(your_pool), MAX_OFFER_ITEMS) + 1):
-        for offer_combo in combinations(your_pool, r):
-            offer_ids = frozenset(i['userAssetId'] for i in offer_combo)
-            if offer_ids in seen_offers:
-                continue
-            offer_total = sum(get_item_value(i, item_values) for i in offer_combo)
-
-            for s in range(1, min(len(their_pool), MAX_REQUEST_ITEMS) + 1):
-                for ask_combo in combinations(their_pool, s):
-                    ask_total = sum(get_item_value(i, item_values) for i in ask_combo)
-                    if ask_total <= offer_total:
-                        continue
-                    if within_valued_premium_bounds(offer_total, ask_total):
-                        trade = {
-                            'items': list(offer_combo),
-                            'their_items': list(ask_combo),
-                            'my_total_rap': offer_total,
-                            'their_total_rap': ask_total,
-                            'rap_gain': ask_total - offer_total,
-                            'mode': 'upgrade_to_valued',
-                        }
-                        best.append(trade)
-                        seen_offers.add(offer_ids)
-                        return sorted(best, key=lambda x: x['rap_gain'], reverse=True)[:1]
-    return sorted(best, key=lambda x: x['rap_gain'], reverse=True)[:1]
+    your_vals = [get_item_value(i, item_values) for i in your_pool]
+    asks = SubsetSums(their_pool, [get_item_value(i, item_values) for i in their_pool], MAX_REQUEST_ITEMS)
+    phases = [('first', [(r, s, RULE_VALUED) for r in _offer_sizes(your_pool) for s in asks.sizes()])]
+    return _search_phases(your_pool, your_vals, asks, phases, 'upgrade_to_valued',
+                          SearchBudget.for_call(deadline_ms, max_evals), meta)
 
 # =====================
 # (Other finders kept for flexibility)
 # =====================
-def find_upgrade_trade(your_inventory, their_inventory, item_values):
-    your_inventory = sorted(your_inventory, key=lambda item: get_item_value(item, item_values), reverse=True)[:10]
-    their_inventory = sorted(their_inventory, key=lambda item: get_item_value(item, item_values), reverse=True)[:10]
-    top_trades = []
-    unique_offerings = set()
-    for r in range(1, min(len(your_inventory), MAX_OFFER_ITEMS) + 1):
-        for combo in combinations(your_inventory, r):
-            if AVOID_PROJECTED_OFFER and any(is_projected(x, item_values) for x in combo):
-                continue
-            combo_total_rap = sum(get_item_value(item, item_values) for item in combo)
-            combo_set = frozenset(item['userAssetId'] for item in combo)
-            if combo_set in unique_offerings:
-                continue
-            for s in range(1, min(len(their_inventory), MAX_REQUEST_ITEMS) + 1):
-                for their_combo in combinations(their_inventory, s):
-                    if AVOID_PROJECTED and any(is_projected(x, item_values) for x in their_combo):
-                        continue
-                    their_combo_total_rap = sum(get_item_value(item, item_values) for item in their_combo)
-                    if s >= r or their_combo_total_rap <= combo_total_rap:
-                        continue
-                    if calculate_rap_gain(combo_total_rap, their_combo_total_rap):
-                        top_trades.append({
-                            'items': combo,
-                            'their_items': their_combo,
-                            'my_total_rap': combo_total_rap,
-                            'their_total_rap': their_combo_total_rap,
-                            'rap_gain': their_combo_total_rap - combo_total_rap,
-                            'mode': 'upgrade'
-                        })
-                        unique_offerings.add(combo_set)
-                        return sorted(top_trades, key=lambda x: x['rap_gain'], reverse=True)[:1]
-    return sorted(top_trades, key=lambda x: x['rap_gain'], reverse=True)[:1]
-
-def find_downgrade_trade(your_inventory, their_inventory, item_values):
+def find_upgrade_trade(your_inventory, their_inventory, item_values,
+                       deadline_ms=None, max_evals=None, meta=None):
+    your_pool = _sorted_pool(your_inventory, item_values, SEARCH_POOL_SIZE)
+    their_pool = _sorted_pool(their_inventory, item_values, SEARCH_POOL_SIZE)
+    if AVOID_PROJECTED_OFFER:
+        your_pool = [i for i in your_pool if not is_projected(i, item_values)]
+    if AVOID_PROJECTED:
+        their_pool = [i for i in their_pool if not is_projected(i, item_values)]
+
+    your_vals = [get_item_value(i, item_values) for i in your_pool]
+    asks = SubsetSums(their_pool, [get_item_value(i, item_values) for i in their_pool], MAX_REQUEST_ITEMS)
+    # fewer items back, worth more
+    phases = [('first', [(r, s, RULE_TIER_UP) for r in _offer_sizes(your_pool) for s in asks.sizes() if s < r])]
+    return _search_phases(your_pool, your_vals, asks, phases, 'upgrade',
+                          SearchBudget.for_call(deadline_ms, max_evals), meta)
+
+def find_downgrade_trade(your_inventory, their_inventory, item_values,
+                         deadline_ms=None, max_evals=None, meta=None):
     # Filter out items below minimum value threshold
     your_inventory = [item for item in your_inventory
                      if get_item_value(item, item_values) >= MIN_ITEM_VALUE]
     their_inventory = [item for item in their_inventory
                       if get_item_value(item, item_values) >= MIN_ITEM_VALUE]
-    
+
     if not your_inventory or not their_inventory:
+        SearchBudget().report(meta)
         return []
-        
-    your_inventory = sorted(your_inventory, key=lambda item: get_item_value(item, item_values), reverse=True)[:10]
-    their_inventory = sorted(their_inventory, key=lambda item: get_item_value(item, item_values), reverse=True)[:10]
-    best_trades = []
-    unique_offerings = set()
-    for r in range(1, min(len(your_inventory), MAX_OFFER_ITEMS) + 1):
-        for your_combo in combinations(your_inventory, r):
-            if AVOID_PROJECTED_OFFER and any(is_projected(x, item_values) for x in your_combo):
+
+    your_pool = _sorted_pool(your_inventory, item_values, SEARCH_POOL_SIZE)
+    their_pool = _sorted_pool(their_inventory, item_values, SEARCH_POOL_SIZE)
+    if AVOID_PROJECTED_OFFER:
+        your_pool = [i for i in your_pool if not is_projected(i, item_values)]
+    if AVOID_PROJECTED:
+        their_pool = [i for i in their_pool if not is_projected(i, item_values)]
+
+    your_vals = [get_item_value(i, item_values) for i in your_pool]
+    asks = SubsetSums(their_pool, [get_item_value(i, item_values) for i in their_pool], MAX_REQUEST_ITEMS)
+    phases = [
+        # 1 item for 2+: every requested item cheaper than the one we give; first hit wins
+        ('first', [(1, s, RULE_TIER_SPLIT) for s in asks.sizes() if s >= 2 and your_pool]),
+        # several items on both sides: more items back must be worth more, fewer worth less
+        ('best', [(r, s, RULE_TIER_UP if r < s else RULE_TIER_DOWN)
+                  for r in _offer_sizes(your_pool) if r >= 2 for s in asks.sizes() if s != r]),
+    ]
+    return _search_phases(your_pool, your_vals, asks, phases, 'downgrade',
+                          SearchBudget.for_call(deadline_ms, max_evals), meta)
+
+def find_1v1_trade(your_inventory, their_inventory, item_values,
+                   deadline_ms=None, max_evals=None, meta=None):
+    your_pool = _sorted_pool(your_inventory, item_values, SEARCH_POOL_SIZE)
+    their_pool = _sorted_pool(their_inventory, item_values, SEARCH_POOL_SIZE)
+    your_vals = [get_item_value(i, item_values) for i in your_pool]
+    asks = SubsetSums(their_pool, [get_item_value(i, item_values) for i in their_pool], 1)
+    phases = [('first', [(1, 1, RULE_TIER_UP)] if your_pool and asks.sizes() else [])]
+    return _search_phases(your_pool, your_vals, asks, phases, '1v1',
+                          SearchBudget.for_call(deadline_ms, max_evals), meta)
+
+# =====================
+# Unified multi-mode search
+# =====================
+# One pass for every enabled mode. Each mode's candidate pool is a
+# subsequence of the same value-sorted inventory, so both sides are
+# enumerated once over the union of the pools and every item carries a bit
+# per mode it belongs to. A combo counts for a mode only if all its items
+# have that mode's bit, which keeps each mode's order (and so its picks)
+# identical to running its finder on its own.
+# The pass is scalar, so it only pays off with more than one finder to run;
+# a single mode goes to its own finder and the vectorized path there.
+SEARCH_UNIFIED = bool(SEARCH.get("unified", True))
+MODE_BITS = {'valued': 1, 'upgrade': 2, 'downgrade': 4, '1v1': 8}
+MODE_TRADE_NAMES = {'valued': 'upgrade_to_valued', 'upgrade': 'upgrade', 'downgrade': 'downgrade', '1v1': '1v1'}
+
+def _union_pool(inventory, item_values, offer_side: bool):
+    """(pool, per-item mode bits) mirroring the pool rules of each finder."""
+    avoid = AVOID_PROJECTED_OFFER if offer_side else AVOID_PROJECTED
+    ranked = sorted(inventory, key=lambda it: get_item_value(it, item_values), reverse=True)
+    pool, masks = [], []
+    valued_rank = search_rank = downgrade_rank = 0
+    for it in ranked:
+        bits = 0
+        skip_projected = avoid and is_projected(it, item_values)
+        if not (offer_side and it['assetId'] in ITEMS_I_WANT_TO_KEEP):
+            if valued_rank < VALUED_POOL_SIZE:
+                side_ok = is_rap_only(it, item_values) if offer_side else is_valued(it, item_values)
+                if side_ok and not skip_projected:
+                    bits |= MODE_BITS['valued']
+            valued_rank += 1
+        if search_rank < SEARCH_POOL_SIZE:
+            bits |= MODE_BITS['1v1']
+            if not skip_projected:
+                bits |= MODE_BITS['upgrade']
+        search_rank += 1
+        if get_item_value(it, item_values) >= MIN_ITEM_VALUE:
+            if downgrade_rank < SEARCH_POOL_SIZE and not skip_projected:
+                bits |= MODE_BITS['downgrade']
+            downgrade_rank += 1
+        if bits:
+            pool.append(it)
+            masks.append(bits)
+    return pool, masks
+
+def _combo_bits(masks, combo) -> int:
+    bits = ~0
+    for i in combo:
+        bits &= masks[i]
+    return bits
+
+def _live_bits(tracks) -> int:
+    bits = 0
+    for track in tracks:
+        bits |= track.bit
+    return bits
+
+class _ModeTrack:
+    """One (mode, phase) of the unified pass: its ask view, entries by offer size and current pick."""
+    __slots__ = ("mode", "phase", "bit", "pick", "asks", "pairs", "hit", "done")
+
+    def __init__(self, mode, phase, pick, asks: SubsetSums, entries):
+        self.mode = mode
+        self.phase = phase
+        self.bit = MODE_BITS[mode]
+        self.pick = pick
+        self.asks = asks
+        self.pairs: Dict[int, List[Tuple[int, TradeRule]]] = dict(_group_by_offer_size(entries))
+        self.hit = None   # 'first': (offer, ask total, ask); 'best': (gain, (offer, ask total, ask))
+        self.done = not entries
+
+    def consider(self, offer, offer_total, windows: dict):
+        found = None
+        for s, rule in self.pairs.get(len(offer), ()):
+            # the window depends only on the rule kind; shared by every track for this offer
+            if rule.kind not in windows:
+                windows[rule.kind] = _rule_window(rule, offer_total)
+            window = windows[rule.kind]
+            if not window:
                 continue
-            your_combo_total_rap = sum(get_item_value(item, item_values) for item in your_combo)
-            combo_set = frozenset(item['userAssetId'] for item in your_combo)
-            if combo_set in unique_offerings:
+            # +-1 absorbs float rounding; _rule_accepts applies the exact rule
+            hit = self.asks.best_in_window(
+                [s], window[0] - 1, window[1] + 1,
+                lambda total, top: _rule_accepts(rule, offer_total, total, top),
+            )
+            if hit and (found is None or hit[0] > found[0]):
+                found = hit
+        if not found:
+            return
+        if self.pick == 'first':
+            self.hit = (offer, found[0], found[1])
+            self.done = True
+        elif self.hit is None or found[0] - offer_total > self.hit[0]:
+            self.hit = (found[0] - offer_total, (offer, found[0], found[1]))
+
+    def result(self):
+        if self.hit is None:
+            return None
+        return self.hit if self.pick == 'first' else self.hit[1]
+
+def _ask_view(asks: SubsetSums, combo_bits, bit, max_size) -> SubsetSums:
+    """The asks a single mode may use, same order as its own SubsetSums would have."""
+    view = SubsetSums(asks.pool, asks.values, 0)
+    for size in asks.sizes():
+        if size > max_size:
+            continue
+        keep = [k for k, bits in enumerate(combo_bits[size]) if bits & bit]
+        if keep:
+            view.totals[size] = [asks.totals[size][k] for k in keep]
+            view.combos[size] = [asks.combos[size][k] for k in keep]
+            view.maxes[size] = [asks.maxes[size][k] for k in keep]
+    return view
+
+def search_modes(your_inventory, their_inventory, item_values, modes: List[str], exhaustive: bool = False):
+    """
+    Run the finders for `modes` (in trading_modes priority order) in one
+    pass. Returns {mode: [trade] or []}. Unless exhaustive, modes ranked
+    below one that is already decided with a trade are dropped early and
+    come back empty.
+    """
+    modes = [m for m in dict.fromkeys(modes) if m in MODE_BITS]
+    results = {m: [] for m in modes}
+    your_pool, your_masks = _union_pool(your_inventory, item_values, offer_side=True)
+    their_pool, their_masks = _union_pool(their_inventory, item_values, offer_side=False)
+    if not modes or not your_pool or not their_pool:
+        return results
+
+    your_vals = [get_item_value(i, item_values) for i in your_pool]
+    asks = SubsetSums(their_pool, [get_item_value(i, item_values) for i in their_pool], MAX_REQUEST_ITEMS)
+    ask_bits = {size: [_combo_bits(their_masks, combo) for combo in asks.combos[size]] for size in asks.sizes()}
+    own_sizes = {m: sum(1 for b in your_masks if b & MODE_BITS[m]) for m in modes}
+
+    tracks: Dict[str, List[_ModeTrack]] = {}
+    for mode in modes:
+        view = _ask_view(asks, ask_bits, MODE_BITS[mode], 1 if mode == '1v1' else MAX_REQUEST_ITEMS)
+        offer_sizes = range(1, min(own_sizes[mode], MAX_OFFER_ITEMS) + 1)
+        sizes = view.sizes()
+        if mode == 'valued':
+            phases = [('first', [(r, s, RULE_VALUED) for r in offer_sizes for s in sizes])]
+        elif mode == 'upgrade':
+            phases = [('first', [(r, s, RULE_TIER_UP) for r in offer_sizes for s in sizes if s < r])]
+        elif mode == 'downgrade':
+            phases = [
+                ('first', [(1, s, RULE_TIER_SPLIT) for s in sizes if s >= 2 and own_sizes[mode]]),
+                ('best', [(r, s, RULE_TIER_UP if r < s else RULE_TIER_DOWN)
+                          for r in offer_sizes if r >= 2 for s in sizes if s != r]),
+            ]
+        else:
+            phases = [('first', [(1, 1, RULE_TIER_UP)] if own_sizes[mode] and sizes else [])]
+        tracks[mode] = [_ModeTrack(mode, n, pick, view, entries) for n, (pick, entries) in enumerate(phases)]
+
+    def decided(mode):
+        # an earlier phase with a hit makes the later ones irrelevant
+        for track in tracks[mode]:
+            if track.hit is not None:
+                return track.done
+            if not track.done:
+                return False
+        return True
+
+    def drop_below_decided():
+        for n, mode in enumerate(modes):
+            if decided(mode) and any(t.hit is not None for t in tracks[mode]):
+                for lower in modes[n + 1:]:
+                    for t in tracks[lower]:
+                        t.hit, t.done = None, True
+                return
+
+    live = [t for m in modes for t in tracks[m] if not t.done]
+    max_r = max((r for t in live for r in t.pairs), default=0)
+    for r in range(1, max_r + 1):
+        live_bits = _live_bits(live)
+        candidates = [i for i, bits in enumerate(your_masks) if bits & live_bits]
+        for offer, offer_total, _ in subsets_of_size([your_vals[i] for i in candidates], r, candidates):
+            bits = _combo_bits(your_masks, offer)
+            if not bits & live_bits:
                 continue
-            if r == 1:
-                for s in range(2, min(len(their_inventory), MAX_REQUEST_ITEMS) + 1):
-                    for their_combo in combinations(their_inventory, s):
-                        if AVOID_PROJECTED and any(is_projected(x, item_values) for x in their_combo):
-                            continue
-                        if all(get_item_value(item, item_values) < your_combo_total_rap for item in their_combo):
-                            their_combo_total_rap = sum(get_item_value(item, item_values) for item in their_combo)
-                            rap_gain = their_combo_total_rap - your_combo_total_rap
-                            trade_id = (tuple(sorted(item['userAssetId'] for item in your_combo)),
-                                        tuple(sorted(item['userAssetId'] for item in their_combo)))
-                            if calculate_rap_gain(your_combo_total_rap, their_combo_total_rap) and trade_id not in unique_offerings:
-                                best_trades.append({
-                                    'items': your_combo,
-                                    'their_items': their_combo,
-                                    'my_total_rap': your_combo_total_rap,
-                                    'their_total_rap': their_combo_total_rap,
-                                    'rap_gain': rap_gain,
-                                    'mode': 'downgrade'
-                                })
-                                unique_offerings.add(trade_id)
-                                return sorted(best_trades, key=lambda x: x['rap_gain'], reverse=True)[:1]
+            windows = {}
+            changed = False
+            for track in live:
+                if track.bit & bits and r in track.pairs:
+                    track.consider(offer, offer_total, windows)
+                    changed |= track.done
+            if changed:
+                if not exhaustive:
+                    drop_below_decided()
+                live = [t for t in live if not t.done]
+                live_bits = _live_bits(live)
+                if not live:
+                    break
+        # every track has now seen all offers of size <= r
+        for track in live:
+            if max(track.pairs, default=0) <= r:
+                track.done = True
+        if not exhaustive:
+            drop_below_decided()
+        live = [t for t in live if not t.done]
+        if not live:
+            break
+
+    for mode in modes:
+        for track in tracks[mode]:
+            hit = track.result()
+            if hit:
+                offer, ask_total, ask = hit
+                results[mode] = [_make_trade([your_pool[i] for i in offer], asks.items(ask),
+                                             sum(your_vals[i] for i in offer), ask_total, MODE_TRADE_NAMES[mode])]
+                break
+    return results
+
+# =====================
+# Evaluation reuse
+# =====================
+# A counterparty's result depends only on the two inventories, the trading
+# config and the snapshot rows of the items in them. Entries are keyed by
+# (our fingerprint, their fingerprint, config hash) and stamped with the
+# snapshot version; after a price refresh, entries whose items all came
+# through the SnapshotDiff unchanged carry over instead of being searched again.
+EVAL_CACHE_ENABLED = bool(SEARCH.get("reuse_evaluations", True))
+EVAL_CACHE_SIZE = int(SEARCH.get("evaluation_cache_size", 4096))
+
+def inventory_fingerprint(inv: List[dict]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for it in sorted(inv, key=lambda it: it['userAssetId']):
+        h.update(struct.pack("<qqq", it['userAssetId'], it['assetId'], int(it.get('recentAveragePrice') or 0)))
+    return h.digest()
+
+def trading_config_hash() -> bytes:
+    """Digest of every setting that can change which trade the finders pick."""
+    settings = {
+        "modes": config['trading_preferences'].get('trading_modes', ['upgrade']),
+        "tiers": RAP_TIERS,
+        "min_item_value": MIN_ITEM_VALUE,
+        "valued_only": UPGRADE_TO_VALUED_ONLY,
+        "valued_premium": (VALUED_PREMIUM_MIN_PERCENT, VALUED_PREMIUM_MAX_PERCENT),
+        "max_items": (MAX_OFFER_ITEMS, MAX_REQUEST_ITEMS),
+        "keep": sorted(ITEMS_I_WANT_TO_KEEP),
+        "projected": (AVOID_PROJECTED, AVOID_PROJECTED_OFFER, PROJECTED_UNKNOWN_IS_PROJECTED),
+        "pools": (SEARCH_POOL_SIZE, VALUED_POOL_SIZE),
+        "strategy": (SEARCH_STRATEGY, SEARCH_SCORE),
+        # a budget-limited or unified search can settle on a different trade
+        "budget": (SEARCH_BUDGET_MS, SEARCH_MAX_EVALS),
+        "unified": SEARCH_UNIFIED,
+    }
+    return hashlib.blake2b(json.dumps(settings, sort_keys=True, default=str).encode(), digest_size=16).digest()
+
+class EvaluationCache:
+    """(our fingerprint, their fingerprint, config hash) -> (snapshot version, asset ids, result), LRU-bounded."""
+
+    def __init__(self, max_entries: int = EVAL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ours = (None, b"")  # our inventory list -> fingerprint (SelfInventory hands out the same list until it changes)
+        self.config_hash = trading_config_hash()  # the config is read once at startup
+        self.hits = self.reused = self.misses = 0
+
+    def key(self, your_inventory: List[dict], other_inventory: List[dict]) -> tuple:
+        with self._lock:
+            ours, fingerprint = self._ours
+        if ours is not your_inventory:
+            fingerprint = inventory_fingerprint(your_inventory)
+            with self._lock:
+                self._ours = (your_inventory, fingerprint)
+        return fingerprint, inventory_fingerprint(other_inventory), self.config_hash
+
+    def lookup(self, key: tuple, version: int):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            cached_version, asset_ids, result = entry
+            if cached_version != version:
+                changed = snapshot_events.changed_since(cached_version, version)
+                if changed is None or not changed.isdisjoint(asset_ids):
+                    del self._entries[key]
+                    self.misses += 1
+                    return None
+                self._entries[key] = (version, asset_ids, result)
+                self.reused += 1
             else:
-                for s in range(1, min(len(their_inventory), MAX_REQUEST_ITEMS) + 1):
-                    for their_combo in combinations(their_inventory, s):
-                        if AVOID_PROJECTED and any(is_projected(x, item_values) for x in their_combo):
-                            continue
-                        their_combo_total_rap = sum(get_item_value(item, item_values) for item in their_combo)
-                        if (r < s and their_combo_total_rap > your_combo_total_rap) or (r > s and their_combo_total_rap < your_combo_total_rap):
-                            rap_gain = their_combo_total_rap - your_combo_total_rap
-                            trade_id = (tuple(sorted(item['userAssetId'] for item in your_combo)),
-                                        tuple(sorted(item['userAssetId'] for item in their_combo)))
-                            if calculate_rap_gain(your_combo_total_rap, their_combo_total_rap) and trade_id not in unique_offerings:
-                                best_trades.append({
-                                    'items': your_combo,
-                                    'their_items': their_combo,
-                                    'my_total_rap': your_combo_total_rap,
-                                    'their_total_rap': their_combo_total_rap,
-                                    'rap_gain': rap_gain,
-                                    'mode': 'downgrade'
-                                })
-                                unique_offerings.add(trade_id)
-    return sorted(best_trades, key=lambda x: x['rap_gain'], reverse=True)[:1]
-
-def find_1v1_trade(your_inventory, their_inventory, item_values):
-    your_inventory = sorted(your_inventory, key=lambda item: get_item_value(item, item_values), reverse=True)[:10]
-    their_inventory = sorted(their_inventory, key=lambda item: get_item_value(item, item_values), reverse=True)[:10]
-    top_trades = []
-    unique_offerings = set()
-    for your_item in your_inventory:
-        for their_item in their_inventory:
-            your_item_value = get_item_value(your_item, item_values)
-            their_item_value = get_item_value(their_item, item_values)
-            combo_set = frozenset([your_item['userAssetId']])
-            if combo_set in unique_offerings or their_item_value <= your_item_value:
-                continue
-            rap_gain = their_item_value - your_item_value
-            if calculate_rap_gain(your_item_value, their_item_value):
-                top_trades.append({
-                    'items': [your_item],
-                    'their_items': [their_item],
-                    'my_total_rap': your_item_value,
-                    'their_total_rap': their_item_value,
-                    'rap_gain': rap_gain,
-                    'mode': '1v1'
-                })
-                unique_offerings.add(combo_set)
-                return sorted(top_trades, key=lambda x: x['rap_gain'], reverse=True)[:1]
-    return sorted(top_trades, key=lambda x: x['rap_gain'], reverse=True)[:1]
+                self.hits += 1
+            self._entries.move_to_end(key)
+            return result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits,
+                    "reused": self.reused, "misses": self.misses}
+
+    def store(self, key: tuple, version: int, asset_ids, result):
+        with self._lock:
+            self._entries[key] = (version, frozenset(asset_ids), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+evaluation_cache = EvaluationCache()
 
 # =====================
 # UI helpers (console)
@@ -1019,29 +3174,45 @@ def _panel_visible_asset_ids(driver, panel):
     except Exception:
         return []
 
+# findPanel(side) is get_inventory_panel() in the page, for panels re-rendered mid-wait
+_FIND_PANEL_JS = """
+function findPanel(side) {
+  for (const h of document.querySelectorAll('h2.inventory-label.paired-name')) {
+    const txt = (h.textContent || '').trim();
+    const match = side === 'your' ? txt === 'Your Inventory'
+                                  : (txt.endsWith('Inventory') && txt !== 'Your Inventory');
+    if (!match) continue;
+    for (let el = h.parentElement; el; el = el.parentElement) {
+      const cls = el.getAttribute('class') || '';
+      if (cls.includes('inventory') || cls.includes('panel') || cls.includes('trade')) return el;
+    }
+    return h;
+  }
+  return null;
+}
+"""
+
 def _panel_click_arrow_and_wait(driver, side: str, panel, direction="right") -> bool:
-    before = _panel_visible_asset_ids(driver, panel)
+    """Clicks the panel's page arrow and waits, in one async script, for its thumbnails to change."""
     css = "span.icon-right" if direction == "right" else "span.icon-left"
     try:
-        arrow = panel.find_element(By.CSS_SELECTOR, css)
+        return bool(driver.execute_async_script(_OBSERVE_JS + _FIND_PANEL_JS + """
+            const [pnl, side, css, timeoutMs, pollMs, done] = arguments;
+            const ids = (p) => Array.from(p.querySelectorAll('span.thumbnail-2d-container[thumbnail-target-id]'),
+                                          (e) => e.getAttribute('thumbnail-target-id')).join(',');
+            const arrow = pnl.querySelector(css);
+            if (!arrow) { done(false); return; }
+            const before = ids(pnl);
+            arrow.click();
+            observeUntil(document.body, () => {
+              const cur = document.contains(pnl) ? pnl : findPanel(side);
+              if (!cur) throw new Error('panel gone');
+              const after = ids(cur);
+              return after !== '' && after !== before;
+            }, timeoutMs, pollMs, done);
+        """, panel, side, css, int(PAGE_CHANGE_TIMEOUT * 1000), MUTATION_POLL_MS))
     except Exception:
         return False
-    try:
-        arrow.click()
-    except Exception:
-        driver.execute_script("arguments[0].click();", arrow)
-
-    # short polling for change
-    deadline = time.time() + PAGE_CHANGE_TIMEOUT
-    while time.time() < deadline:
-        pnl = get_inventory_panel(driver, side)
-        if not pnl:
-            return False
-        after = _panel_visible_asset_ids(driver, pnl)
-        if after and after != before:
-            return True
-        time.sleep(MUTATION_POLL_MS / 1000.0)
-    return False
 
 def _go_to_first_page(driver, side: str, max_hops: int = 10 if FAST_MODE else 40):
     panel = get_inventory_panel(driver, side)
@@ -1062,6 +3233,70 @@ def _go_to_first_page(driver, side: str, max_hops: int = 10 if FAST_MODE else 40
             break
         hops += 1
 
+# pickCards(panel, {assetId: count}) clicks up to `count` distinct thumbnails
+# per assetId among the cards rendered in the panel, skipping 'on hold' and
+# already-selected cards when possible. Returns {assetId: clicked}.
+_PICK_CARDS_JS = """
+function pickCards(pnl, need) {
+  const result = {};
+  const isSelected = (card) => {
+    // Heuristics for "already in trade"/selected.
+    if (!card) return false;
+    const cls = (card.getAttribute('class') || '').toLowerCase();
+    if (cls.includes('selected') || cls.includes('in-trade')) return true;
+    if (card.getAttribute('aria-pressed') === 'true') return true;
+    if (card.dataset && (card.dataset.selected === 'true' || card.dataset.inTrade === 'true')) return true;
+    // Some UIs add a checkmark overlay:
+    if (card.querySelector('.selected, .in-trade, .check, .checkmark')) return true;
+    return false;
+  };
+  const isHolding = (card) => {
+    if (!card) return false;
+    return !!card.querySelector('.item-card-holding-label');
+  };
+
+  for (const [aid, countNeeded] of Object.entries(need)) {
+    if (!countNeeded || countNeeded <= 0) continue;
+    let remaining = countNeeded;
+
+    // Prefer targeting by userAssetId if present on DOM
+    // (Some UIs expose data-userasset-id on each card)
+    // If not, fallback to many cards with same assetId.
+    const thumbs = pnl.querySelectorAll('span.thumbnail-2d-container[thumbnail-target-id="'+aid+'"]');
+    // We will traverse and click DISTINCT cards until we satisfy `remaining`
+    for (const th of thumbs) {
+      if (remaining <= 0) break;
+      const card = th.closest('.item-card') || th.closest('[data-item-card]');
+      // Skip cards that appear "on hold" or already selected when possible:
+      if (isHolding(card) || isSelected(card)) continue;
+
+      // Click this card
+      th.click();
+      remaining -= 1;
+    }
+
+    // If we still need more, relax the filters and allow cards that look selected/holding
+    // (some UIs do not update classes immediately, or use different markup)
+    if (remaining > 0) {
+      for (const th of thumbs) {
+        if (remaining <= 0) break;
+        const card = th.closest('.item-card') || th.closest('[data-item-card]');
+        // Try to avoid double-click deselect: if it *looks* selected, skip it.
+        // But if every card looked selected, we at least try a click:
+        // here we only click ones that don't look selected to reduce toggling risk.
+        const cls = (card && card.getAttribute('class') || '').toLowerCase();
+        if (cls.includes('selected') || cls.includes('in-trade')) continue;
+        th.click();
+        remaining -= 1;
+      }
+    }
+
+    result[aid] = countNeeded - Math.max(0, remaining);
+  }
+  return result;
+}
+"""
+
 def _bulk_click_asset_ids_on_page_multi(driver, panel, need_counts):
     """
     Click up to `count` distinct thumbnails for each assetId on this panel.
@@ -1071,74 +3306,59 @@ def _bulk_click_asset_ids_on_page_multi(driver, panel, need_counts):
     Returns: dict[str assetId] -> int actually clicked on this page
     """
     try:
-        clicked_counts = driver.execute_script("""
-            const pnl = arguments[0];
-            const need = arguments[1]; // {assetId: count}
-            const result = {};
-            const isSelected = (card) => {
-              // Heuristics for "already in trade"/selected.
-              if (!card) return false;
-              const cls = (card.getAttribute('class') || '').toLowerCase();
-              if (cls.includes('selected') || cls.includes('in-trade')) return true;
-              if (card.getAttribute('aria-pressed') === 'true') return true;
-              if (card.dataset && (card.dataset.selected === 'true' || card.dataset.inTrade === 'true')) return true;
-              // Some UIs add a checkmark overlay:
-              if (card.querySelector('.selected, .in-trade, .check, .checkmark')) return true;
-              return false;
-            };
-            const isHolding = (card) => {
-              if (!card) return false;
-              return !!card.querySelector('.item-card-holding-label');
-            };
-
-            for (const [aid, countNeeded] of Object.entries(need)) {
-              if (!countNeeded || countNeeded <= 0) continue;
-              let remaining = countNeeded;
-
-              // Prefer targeting by userAssetId if present on DOM
-              // (Some UIs expose data-userasset-id on each card)
-              // If not, fallback to many cards with same assetId.
-              const thumbs = pnl.querySelectorAll('span.thumbnail-2d-container[thumbnail-target-id="'+aid+'"]');
-              // We will traverse and click DISTINCT cards until we satisfy `remaining`
-              for (const th of thumbs) {
-                if (remaining <= 0) break;
-                const card = th.closest('.item-card') || th.closest('[data-item-card]');
-                // Skip cards that appear "on hold" or already selected when possible:
-                if (isHolding(card) || isSelected(card)) continue;
-
-                // Click this card
-                th.click();
-                remaining -= 1;
-              }
-
-              // If we still need more, relax the filters and allow cards that look selected/holding
-              // (some UIs do not update classes immediately, or use different markup)
-              if (remaining > 0) {
-                for (const th of thumbs) {
-                  if (remaining <= 0) break;
-                  const card = th.closest('.item-card') || th.closest('[data-item-card]');
-                  // Try to avoid double-click deselect: if it *looks* selected, skip it.
-                  // But if every card looked selected, we at least try a click:
-                  // here we only click ones that don't look selected to reduce toggling risk.
-                  const cls = (card && card.getAttribute('class') || '').toLowerCase();
-                  if (cls.includes('selected') || cls.includes('in-trade')) continue;
-                  th.click();
-                  remaining -= 1;
-                }
-              }
-
-              result[aid] = countNeeded - Math.max(0, remaining);
-            }
-            return result;
-        """, panel, dict(need_counts)) or {}
+        clicked_counts = driver.execute_script(
+            _PICK_CARDS_JS + "return pickCards(arguments[0], arguments[1]);",
+            panel, dict(need_counts)) or {}
         # Remove zero entries; return only what was clicked
         return {k: int(v) for k, v in clicked_counts.items() if int(v) > 0}
     except Exception:
         return {}
 
-def _select_items_across_pages_multi(driver, side: str, need_counts):
+def _search_click_asset_ids_multi(driver, panel, need_counts, names):
+    """
+    Jump straight to each wanted item through the panel's search box instead
+    of paging: one async script types each item's name, waits in the page for
+    its thumbnail to render, picks the cards and finally clears the box.
+
+    names: dict[str assetId] -> item name to search for
+    Returns dict[str assetId] -> int clicked, or None if the panel has no search box.
+    """
+    try:
+        return driver.execute_async_script(_OBSERVE_JS + _PICK_CARDS_JS + """
+            const [pnl, need, names, timeoutMs, pollMs, done] = arguments;
+            const box = pnl.querySelector('input[type="search"], input[placeholder*="earch" i]');
+            if (!box) { done(null); return; }
+            const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, 'value').set;
+            const search = (text) => {
+              setValue.call(box, text);  // native setter so framework-bound inputs see the change
+              box.dispatchEvent(new Event('input', {bubbles: true}));
+              box.dispatchEvent(new Event('change', {bubbles: true}));
+              box.dispatchEvent(new KeyboardEvent('keyup', {key: 'Enter', bubbles: true}));
+            };
+            const rendered = (aid) => new Promise((resolve) => {
+              const sel = 'span.thumbnail-2d-container[thumbnail-target-id="'+aid+'"]';
+              observeUntil(pnl, () => !!pnl.querySelector(sel), timeoutMs, pollMs, resolve);
+            });
+            (async () => {
+              const clicked = {};
+              for (const [aid, count] of Object.entries(need)) {
+                if (!names[aid]) continue;
+                search(names[aid]);
+                if (await rendered(aid)) Object.assign(clicked, pickCards(pnl, {[aid]: count}));
+              }
+              search('');
+              done(clicked);
+            })().catch(() => done({}));
+        """, panel, dict(need_counts), names, int(PAGE_CHANGE_TIMEOUT * 1000), MUTATION_POLL_MS)
+    except Exception:
+        return None
+
+def _select_items_across_pages_multi(driver, side: str, need_counts, names: Optional[dict] = None):
     """
     need_counts: dict[str assetId] -> int copies needed.
+    names: dict[str assetId] -> name; with SELECT_BY_SEARCH the items are
+    looked up through the panel's search box first, and only what that
+    misses is left to the page scan.
     Returns True when all counts hit zero.
     """
     # normalize keys to str and drop zeros
@@ -1146,6 +3366,15 @@ def _select_items_across_pages_multi(driver, side: str, need_counts):
     if not remaining:
         return True
 
+    if SELECT_BY_SEARCH and names:
+        panel = get_inventory_panel(driver, side)
+        clicked_counts = _search_click_asset_ids_multi(driver, panel, remaining, names) if panel else None
+        for aid, got in (clicked_counts or {}).items():
+            remaining[aid] = max(0, remaining.get(aid, 0) - int(got))
+        remaining = {k: v for k, v in remaining.items() if v > 0}
+        if not remaining:
+            return True
+
     _go_to_first_page(driver, side)
 
     seen_sigs = set()
@@ -1184,7 +3413,13 @@ def _select_items_across_pages_multi(driver, side: str, need_counts):
 
     return len(remaining) == 0
 
-def send_trade_via_selenium(driver, other_user_id, my_items, their_items):
+def send_trade_via_selenium(driver, other_user_id, my_items, their_items, missing_sides: Optional[list] = None,
+                            totp_secret: str = None):
+    """
+    Composes and sends the offer in the trade UI. Returns True once submitted.
+    If items can't be found in a panel, "your"/"their" is appended to
+    missing_sides (when given) so the caller can tell stale inventories apart.
+    """
     trade_url = f"https://www.roblox.com/users/{other_user_id}/trade"
     driver.get(trade_url)
 
@@ -1216,14 +3451,18 @@ def send_trade_via_selenium(driver, other_user_id, my_items, their_items):
     # Select YOUR items
     # Select YOUR items (support multiple copies)
     my_need = _count_by_asset_id(my_items)
-    if not _select_items_across_pages_multi(driver, "your", my_need):
+    if not _select_items_across_pages_multi(driver, "your", my_need, _names_by_asset_id(my_items)):
         print(f"{soft_red}[UI] Could not add all YOUR items (missing some).{RESET_COLOR}")
+        if missing_sides is not None:
+            missing_sides.append("your")
         return False
 
     # Select THEIR items (support multiple copies)
     their_need = _count_by_asset_id(their_items)
-    if not _select_items_across_pages_multi(driver, "their", their_need):
+    if not _select_items_across_pages_multi(driver, "their", their_need, _names_by_asset_id(their_items)):
         print(f"{soft_red}[UI] Could not add all THEIR items (missing some).{RESET_COLOR}")
+        if missing_sides is not None:
+            missing_sides.append("their")
         return False
 
     # Click Send/Make Offer button
@@ -1262,17 +3501,669 @@ def send_trade_via_selenium(driver, other_user_id, my_items, their_items):
         pass  # modal may not always appear
 
     # 2FA
-    if not maybe_handle_two_step_verification(driver, max_attempts=2 if FAST_MODE else 3):
+    if not maybe_handle_two_step_verification(driver, max_attempts=2 if FAST_MODE else 3, totp_secret=totp_secret):
         print(f"{soft_red}[2FA] Verification failed. Trade not sent.{RESET_COLOR}")
         return False
 
-    # Optional: reset both panels to page 1 to keep UI tidy
-    _go_to_first_page(driver, "your")
-    _go_to_first_page(driver, "their")
-
     print(f"{soft_green}[OK] Trade submitted in UI for user {other_user_id}.{RESET_COLOR}")
     return True
 
+# =====================
+# Trade sending over HTTP
+# =====================
+# Posts the offer straight to the trades API with the session cookie, by
+# userAssetId, instead of driving the composer. The API asks for a CSRF token
+# first (403 + x-csrf-token: resend with it) and may answer with a two-step
+# challenge (403 + rblx-challenge-*): verify a code, continue the challenge and
+# resend with the challenge headers. sender.backend picks "http" or "selenium";
+# with sender.fallback_to_selenium the UI path covers HTTP transport failures.
+SENDER = config.get("sender", {})
+SENDER_BACKEND = SENDER.get("backend", "selenium")   # "selenium" or "http"
+SENDER_FALLBACK = bool(SENDER.get("fallback_to_selenium", True))
+
+trade_send_url = "https://trades.roblox.com/v1/trades/send"
+two_step_verify_url_template = "https://twostepverification.roblox.com/v1/users/{}/challenges/authenticator/verify"
+challenge_continue_url = "https://apis.roblox.com/challenge/v1/continue"
+
+class SendOutcome(NamedTuple):
+    """sent: the API accepted the offer; fallback: it never got a verdict, so another backend may try."""
+    sent: bool
+    fallback: bool = False
+    trade_id: Optional[int] = None
+
+def _json_body(r: requests.Response) -> dict:
+    try:
+        body = r.json()
+    except ValueError:
+        return {}
+    return body if isinstance(body, dict) else {}
+
+class HttpTradeSender:
+    """Trade sender over the shared HttpClient; the CSRF token is kept across sends."""
+
+    def __init__(self, user_id: int = USER_ID, client: HttpClient = None, max_attempts: int = 2 if FAST_MODE else 3,
+                 totp_secret: str = None):
+        self.user_id = user_id
+        self.client = client
+        self.totp_secret = totp_secret
+        self.max_attempts = max_attempts
+        self._csrf = ""
+        self._lock = threading.Lock()
+
+    def _post(self, endpoint: str, url: str, payload: dict, headers: Dict[str, str] = None) -> requests.Response:
+        """POST with the current CSRF token, renewing it once if the API hands out a new one."""
+        client = self.client or http_client
+        r = None
+        for _ in range(2):
+            with self._lock:
+                token = self._csrf
+            r = client.post(endpoint, url, json=payload, auth=True,
+                            headers={**(headers or {}), 'x-csrf-token': token})
+            fresh = r.headers.get('x-csrf-token')
+            if r.status_code != 403 or not fresh or fresh == token:
+                return r
+            with self._lock:
+                self._csrf = fresh
+        return r
+
+    def _solve_challenge(self, r: requests.Response) -> Optional[Dict[str, str]]:
+        """Answers a two-step challenge; returns the headers to resend with, or None."""
+        challenge_id = r.headers.get('rblx-challenge-id')
+        try:
+            meta = json.loads(base64.b64decode(r.headers.get('rblx-challenge-metadata', '')))
+        except ValueError:
+            return None
+        action = meta.get("actionType", "Generic")
+        for attempt in range(1, self.max_attempts + 1):
+            code = two_step_code(attempt, self.max_attempts, self.totp_secret)
+            if not code:
+                continue
+            v = self._post("two_step", two_step_verify_url_template.format(meta.get("userId", self.user_id)),
+                           {"challengeId": meta.get("challengeId"), "actionType": action, "code": code})
+            token = _json_body(v).get("verificationToken") if v.status_code == 200 else None
+            if not token:
+                print(f"{soft_red}[2FA] Code rejected ({attempt}/{self.max_attempts}).{RESET_COLOR}")
+                continue
+            solved = json.dumps({"verificationToken": token, "rememberDevice": False,
+                                 "challengeId": meta.get("challengeId"), "actionType": action})
+            c = self._post("two_step", challenge_continue_url,
+                           {"challengeId": challenge_id, "challengeType": "twostepverification",
+                            "challengeMetadata": solved})
+            if c.status_code != 200:
+                print(f"{soft_red}[2FA] Challenge continue failed (HTTP {c.status_code}).{RESET_COLOR}")
+                return None
+            print(f"{soft_green}[2FA] Verified.{RESET_COLOR}")
+            return {'rblx-challenge-id': challenge_id,
+                    'rblx-challenge-type': 'twostepverification',
+                    'rblx-challenge-metadata': base64.b64encode(solved.encode()).decode()}
+        return None
+
+    def send(self, other_user_id, my_user_asset_ids: List[int], their_user_asset_ids: List[int]) -> SendOutcome:
+        if not (self.client or http_client).cookie:
+            print(f"{soft_red}[HTTP] No ROBLOSECURITY cookie; cannot send over HTTP.{RESET_COLOR}")
+            return SendOutcome(False, fallback=True)
+        payload = {"offers": [
+            {"userId": self.user_id, "userAssetIds": list(my_user_asset_ids), "robux": 0},
+            {"userId": int(other_user_id), "userAssetIds": list(their_user_asset_ids), "robux": 0},
+        ]}
+        try:
+            r = self._post("trade_send", trade_send_url, payload)
+            if r.status_code == 403 and r.headers.get('rblx-challenge-type') == 'twostepverification':
+                headers = self._solve_challenge(r)
+                if headers is None:
+                    print(f"{soft_red}[2FA] Verification failed. Trade not sent.{RESET_COLOR}")
+                    return SendOutcome(False)
+                r = self._post("trade_send", trade_send_url, payload, headers)
+        except requests.RequestException as e:
+            print(f"{soft_red}[HTTP] Trade send error: {e}{RESET_COLOR}")
+            # a read timeout may still have created the offer; only a failed connect is safe to redo
+            return SendOutcome(False, fallback=isinstance(e, requests.ConnectionError))
+        if r.status_code == 200:
+            trade_id = _json_body(r).get("id")
+            print(f"{soft_green}[OK] Trade sent over HTTP for user {other_user_id} (trade {trade_id}).{RESET_COLOR}")
+            return SendOutcome(True, trade_id=trade_id)
+        errors = _json_body(r).get("errors") or []
+        reason = errors[0].get("message", "") if errors else r.reason
+        print(f"{soft_red}[HTTP] Trade send refused (HTTP {r.status_code}): {reason}{RESET_COLOR}")
+        # 4xx is the API's verdict on the offer itself; the UI would get the same answer
+        return SendOutcome(False, fallback=r.status_code >= 500)
+
+http_trade_sender = HttpTradeSender()
+
+# =====================
+# Accounts and parallel sending
+# =====================
+# config['user'] is the first account; "accounts" lists more, each
+# {"name", "user_id", "cookie_value", "totp_secret", "max_offers_per_hour",
+# "driver_pool_size"}. Discovery and evaluation run once for all of them:
+# every counterparty is matched against the accounts that still have outbound
+# capacity, and the TradeDispatcher sends on each account's own session, one
+# offer at a time per account and concurrently across accounts.
+EXTRA_ACCOUNTS = config.get("accounts", [])
+MAX_OFFERS_PER_HOUR = int(config['limits'].get('max_offers_per_hour', 0))   # per account; 0 = no limit
+SEND_QUEUE_PER_ACCOUNT = int(SENDER.get("queue_per_account", 2))             # ready trades waiting per account
+
+class OutboundLimit:
+    """Offers sent in the last hour, against a per-account cap (0 = no cap)."""
+
+    def __init__(self, per_hour: int):
+        self.per_hour = per_hour
+        self._sent = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        while self._sent and now - self._sent[0] >= 3600:
+            self._sent.popleft()
+
+    def allows(self, queued: int = 0) -> bool:
+        """Whether another offer fits, counting `queued` offers not sent yet."""
+        if self.per_hour <= 0:
+            return True
+        with self._lock:
+            self._trim(time.time())
+            return len(self._sent) + queued < self.per_hour
+
+    def record(self):
+        with self._lock:
+            self._sent.append(time.time())
+
+    def next_free_in(self) -> float:
+        """Seconds until another offer is allowed."""
+        if self.per_hour <= 0:
+            return 0.0
+        with self._lock:
+            now = time.time()
+            self._trim(now)
+            if len(self._sent) < self.per_hour:
+                return 0.0
+            return 3600 - (now - self._sent[0])
+
+class Account:
+    """One trading account: its inventory, HTTP session, browsers and outbound limit."""
+
+    def __init__(self, name: str, user_id: int, cookie: str = None, totp_secret: str = None,
+                 max_per_hour: int = MAX_OFFERS_PER_HOUR, driver_pool_size: int = 1):
+        self.name = name
+        self.user_id = user_id
+        self.totp_secret = totp_secret
+        if cookie is None:
+            # the primary account uses the module-wide client, sender and browsers
+            self.http, self.sender, self.drivers = http_client, http_trade_sender, driver_pool
+        else:
+            self.http = HttpClient(cookie=cookie)
+            self.sender = HttpTradeSender(user_id, client=self.http, totp_secret=totp_secret)
+            self.drivers = DriverPool(size=driver_pool_size, cookie=cookie)
+        self.inventory = SelfInventory(user_id)
+        self.limit = OutboundLimit(max_per_hour)
+
+    def close(self):
+        self.inventory.stop()
+        if self.drivers is not driver_pool:
+            self.drivers.close()
+            self.http.close()
+
+def load_accounts() -> List[Account]:
+    accounts = [Account("main", USER_ID)]
+    for n, spec in enumerate(EXTRA_ACCOUNTS, 1):
+        if not spec.get("cookie_value"):
+            print(f"{soft_red}[Accounts] Account {spec.get('name', n)} has no cookie_value; skipped.{RESET_COLOR}")
+            continue
+        if not spec.get("totp_secret"):
+            # its 2FA prompts would land on a background send thread with no console to answer them
+            print(f"{soft_red}[Accounts] Account {spec.get('name', n)} has no totp_secret; skipped.{RESET_COLOR}")
+            continue
+        accounts.append(Account(spec.get("name", f"account{n}"), int(spec["user_id"]), spec["cookie_value"],
+                                spec["totp_secret"],
+                                int(spec.get("max_offers_per_hour", MAX_OFFERS_PER_HOUR)),
+                                int(spec.get("driver_pool_size", 1))))
+    return accounts
+
+class TradeDispatcher:
+    """
+    Sends ready trades on idle accounts. Each account has one sender thread,
+    so its offers go out in order while different accounts send in parallel.
+    submit() blocks while the account already has SEND_QUEUE_PER_ACCOUNT
+    trades waiting, which keeps evaluation from running far ahead of sending.
+    """
+
+    def __init__(self, accounts: List[Account], deliver, queue_per_account: int = SEND_QUEUE_PER_ACCOUNT):
+        self.accounts = accounts
+        self._deliver = deliver       # deliver(account, user_id, mode, trade) -> bool, on the account's thread
+        self._executors = {a.name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"send-{a.name}")
+                           for a in accounts}
+        self._slots = {a.name: threading.BoundedSemaphore(max(1, queue_per_account)) for a in accounts}
+        self._pending = {a.name: 0 for a in accounts}
+        self._lock = threading.Lock()
+
+    def candidates(self) -> List[Account]:
+        """Accounts still under their outbound limit (queued offers included), least busy first."""
+        with self._lock:
+            pending = dict(self._pending)
+        return sorted((a for a in self.accounts if a.limit.allows(pending[a.name])), key=lambda a: pending[a.name])
+
+    def wait_for_capacity(self):
+        """Sleeps until at least one account may send again."""
+        wait_s = min(a.limit.next_free_in() for a in self.accounts)
+        if wait_s > 0:
+            print(f"{medium_gray}[Accounts] Every account is at its outbound limit; waiting {wait_s:.0f}s.{RESET_COLOR}")
+            time.sleep(wait_s)
+        else:
+            # only the offers still queued fill the limit; they go out (or fail) shortly
+            time.sleep(0.5)
+
+    def available(self) -> List[Account]:
+        """candidates(), waiting for capacity first so a counterparty is never matched against nobody."""
+        while True:
+            accounts = self.candidates()
+            if accounts:
+                return accounts
+            self.wait_for_capacity()
+
+    def submit(self, account: Account, user_id, mode, trade) -> Future:
+        self._slots[account.name].acquire()
+        with self._lock:
+            self._pending[account.name] += 1
+
+        def job():
+            try:
+                return self._deliver(account, user_id, mode, trade)
+            except Exception as e:
+                print(f"{soft_red}[Send] {account.name}: user {user_id} failed: {e}{RESET_COLOR}")
+                return False
+            finally:
+                with self._lock:
+                    self._pending[account.name] -= 1
+                self._slots[account.name].release()
+
+        return self._executors[account.name].submit(job)
+
+    def close(self, wait_for_sends: bool = True):
+        for ex in self._executors.values():
+            ex.shutdown(wait=wait_for_sends)
+
+# =====================
+# Counterparty pipeline
+# =====================
+PIPELINE = config.get("pipeline", {})
+PIPELINE_ENABLED = bool(PIPELINE.get("enabled", False))
+PIPELINE_BACKEND = PIPELINE.get("backend", "threads")   # "threads" or "asyncio" (needs aiohttp)
+PIPELINE_WORKERS = int(PIPELINE.get("workers", 8))
+PIPELINE_PREFETCH = int(PIPELINE.get("prefetch", 32))   # users fetched ahead of the finders
+# >0 runs the finders in that many worker processes (the search is CPU-bound)
+PIPELINE_EVAL_PROCESSES = int(PIPELINE.get("eval_processes", 0))
+PIPELINE_PROCESS_START = PIPELINE.get("process_start_method", "spawn")  # fork is unsafe with our threads
+
+def prefetch_counterparty(user_id):
+    """Network stage: (user_id, inventory), inventory None if we can't trade or they have nothing."""
+    if not can_trade_with(user_id):
+        return user_id, None
+    return user_id, fetch_limiteds_cached(user_id, stop_after=counterparty_stop_after()) or None
+
+async def prefetch_counterparty_async(client: AsyncHttpClient, user_id):
+    """Async twin of prefetch_counterparty."""
+    if not await can_trade_with_async(client, user_id):
+        return user_id, None
+    return user_id, await fetch_limiteds_cached_async(client, user_id, stop_after=counterparty_stop_after()) or None
+
+class ThreadFetcher:
+    """Fetch stage on a thread pool over the shared sync http_client."""
+
+    def __init__(self, workers: int = PIPELINE_WORKERS):
+        self.workers = max(1, workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fetch")
+
+    def submit(self, user_id) -> Future:
+        return self._pool.submit(prefetch_counterparty, user_id)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class AsyncFetcher:
+    """
+    Fetch stage on a private asyncio loop thread; many users can be in flight
+    at once, bounded by the AsyncHttpClient. submit() is thread-safe.
+    """
+
+    def __init__(self, max_in_flight: int = HTTP_ASYNC_MAX_IN_FLIGHT):
+        self.workers = max_in_flight
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="fetch-aio", daemon=True)
+        self._thread.start()
+        self._client = AsyncHttpClient(max_in_flight=max_in_flight)
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.__aenter__(), self._loop).result()
+        except Exception:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            raise
+
+    def submit(self, user_id) -> Future:
+        return asyncio.run_coroutine_threadsafe(prefetch_counterparty_async(self._client, user_id), self._loop)
+
+    def close(self):
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result(timeout=5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+def build_fetcher():
+    if PIPELINE_BACKEND == "asyncio":
+        try:
+            return AsyncFetcher()
+        except RuntimeError as e:
+            print(f"{soft_red}[Pipeline] {e} Falling back to threads.{RESET_COLOR}")
+    return ThreadFetcher()
+
+def _pack_inventory(inv: List[dict]) -> Tuple[bytes, bytes, bytes]:
+    return (array("q", [it['userAssetId'] for it in inv]).tobytes(),
+            array("q", [it['assetId'] for it in inv]).tobytes(),
+            array("q", [int(it.get('recentAveragePrice') or 0) for it in inv]).tobytes())
+
+def _unpack_inventory(cols) -> List[dict]:
+    uaids, aids, raps = (array("q", col) for col in cols)
+    return [{'userAssetId': u, 'assetId': a, 'recentAveragePrice': r, 'name': ''}
+            for u, a, r in zip(uaids, aids, raps)]
+
+def pack_evaluation(your_inventory, other_inventory, item_values) -> tuple:
+    """
+    Compact task for a worker process: both inventories as int64 columns and
+    only the value-index rows for the assets they contain.
+    """
+    index = value_index(item_values)
+    aids, values, flags = array("q"), array("q"), bytearray()
+    for aid in sorted({it['assetId'] for it in your_inventory + other_inventory}):
+        row = index.row(aid)
+        if row is None:
+            continue
+        aids.append(aid)
+        values.append(index.value[row] if index.valued[row] else -1)
+        flags.append(1 if index.projected[row] else 0)
+    return (_pack_inventory(your_inventory), _pack_inventory(other_inventory),
+            (aids.tobytes(), values.tobytes(), bytes(flags)))
+
+def _evaluate_packed(task):
+    """Worker side: rebuild a minimal snapshot and run the search. Returns userAssetIds, not items."""
+    your_cols, other_cols, (aids, values, flags) = task
+    item_values = {str(aid): ['', '', -1, value, -1, -1, -1, 1 if flag else -1, -1, -1]
+                   for aid, value, flag in zip(array("q", aids), array("q", values), flags)}
+    (mode, trade), complete = evaluate_modes(_unpack_inventory(your_cols), _unpack_inventory(other_cols), item_values)
+    if not trade:
+        return None, None, complete
+    return mode, ([it['userAssetId'] for it in trade['items']], [it['userAssetId'] for it in trade['their_items']],
+                  trade['my_total_rap'], trade['their_total_rap'], trade['mode']), complete
+
+class ProcessEvaluator:
+    """
+    Evaluate stage on a process pool. The snapshot refresh and the memo stay
+    in this process; workers get pack_evaluation() tasks and the trade is
+    rebuilt from our own item dicts when the result comes back.
+    Several searches run on the same inventory at once, so with `inventory`
+    set a trade only comes back once its items are reserved there; one that
+    lost its items to an earlier result is searched again.
+    """
+
+    def __init__(self, your_inventory, workers: int = PIPELINE_EVAL_PROCESSES,
+                 inventory: Optional[SelfInventory] = None):
+        self._your_inventory = your_inventory   # callable -> current inventory (SelfInventory.available)
+        self._inventory = inventory
+        self.workers = max(1, workers)
+        self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                         mp_context=multiprocessing.get_context(PIPELINE_PROCESS_START))
+        # re-searches start here, off the pool's result thread
+        self._retries = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evaluate-retry")
+
+    def submit(self, other_inventory) -> Future:
+        out = Future()
+        self._start(other_inventory, out)
+        return out
+
+    def _start(self, other_inventory, out: Future):
+        try:
+            your_inventory = self._your_inventory()
+            filtered, item_values, memo = _evaluation_context(your_inventory, other_inventory)
+            if memo.get("result") is not None:
+                self._settle(other_inventory, memo["result"], out)
+                return
+            by_uaid = {it['userAssetId']: it for it in your_inventory + filtered}
+            task = self._pool.submit(_evaluate_packed, pack_evaluation(your_inventory, filtered, item_values))
+        except Exception as e:
+            out.set_exception(e)
+            return
+
+        def done(f):
+            try:
+                mode, packed, complete = f.result()
+                result = (None, None)
+                if packed:
+                    mine, theirs, my_total, their_total, trade_mode = packed
+                    result = (mode, _make_trade([by_uaid[u] for u in mine], [by_uaid[u] for u in theirs],
+                                                my_total, their_total, trade_mode))
+                _remember_evaluation(memo, result, complete)
+                self._settle(other_inventory, result, out)
+            except Exception as e:
+                out.set_exception(e)
+
+        task.add_done_callback(done)
+
+    def _settle(self, other_inventory, result, out: Future):
+        trade = result[1]
+        reserved = trade and self._inventory is not None
+        if reserved and not self._inventory.reserve(trade['items']):
+            self._retries.submit(self._start, other_inventory, out)
+            return
+        # the pipeline cancels what it no longer wants; don't keep items for those
+        if not out.set_running_or_notify_cancel():
+            if reserved:
+                self._inventory.release(trade['items'])
+            return
+        out.set_result(result)
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._retries.shutdown(wait=False, cancel_futures=True)
+
+def iter_counterparties_serial(user_ids, evaluate):
+    """Same results as CounterpartyPipeline.run, one user at a time on the caller's thread."""
+    for uid in user_ids:
+        uid, inv = prefetch_counterparty(uid)
+        if not inv:
+            yield uid, None, None
+            continue
+        yield (uid,) + tuple(evaluate(inv))
+
+_PIPELINE_DONE = object()
+
+class CounterpartyPipeline:
+    """
+    Three stages over a batch of candidate user IDs:
+      fetch    -> a ThreadFetcher or AsyncFetcher (can-trade check + inventory)
+      evaluate -> one thread runs the finders on fetched inventories, in input order,
+                  or hands them to a ProcessEvaluator and keeps several in flight
+      send     -> whoever iterates run(); the Selenium driver never leaves that thread
+    """
+
+    def __init__(self, evaluate, fetcher=None, prefetch: int = PIPELINE_PREFETCH,
+                 evaluator: Optional[ProcessEvaluator] = None):
+        self._evaluate = evaluate
+        self._fetcher = fetcher or ThreadFetcher()
+        self._prefetch = max(self._fetcher.workers, prefetch)
+        self._evaluator = evaluator
+        self._eval_depth = 2 * evaluator.workers if evaluator else 1
+
+    def close(self):
+        self._fetcher.close()
+        if self._evaluator:
+            self._evaluator.close()
+
+    def _start_eval(self, uid, fetched: Future) -> Future:
+        """Evaluate one fetched user; inline unless a ProcessEvaluator is set."""
+        out = Future()
+        try:
+            _, inv = fetched.result()
+            if not inv:
+                out.set_result((None, None))
+            elif self._evaluator:
+                return self._evaluator.submit(inv)
+            else:
+                out.set_result(tuple(self._evaluate(inv)))
+        except Exception as e:
+            out.set_exception(e)
+        return out
+
+    def run(self, user_ids):
+        """Yields (user_id, mode, trade) per user; mode/trade are None when there is nothing to send."""
+        results = queue.Queue(maxsize=self._prefetch)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def evaluator():
+            ids = iter(user_ids)
+            fetching = deque()
+            evaluating = deque()
+            try:
+                while not stop.is_set():
+                    while len(fetching) < self._prefetch:
+                        uid = next(ids, None)
+                        if uid is None:
+                            break
+                        fetching.append((uid, self._fetcher.submit(uid)))
+                    # hand fetched users to the evaluate stage in order, up to its depth
+                    while fetching and len(evaluating) < self._eval_depth and \
+                            (fetching[0][1].done() or not evaluating):
+                        uid, fut = fetching.popleft()
+                        evaluating.append((uid, self._start_eval(uid, fut)))
+                    if not evaluating:
+                        break
+                    uid, fut = evaluating[0]
+                    if not fut.done():
+                        waiting = [fut]
+                        if fetching and len(evaluating) < self._eval_depth:
+                            waiting.append(fetching[0][1])
+                        wait(waiting, return_when=FIRST_COMPLETED)
+                        continue
+                    evaluating.popleft()
+                    mode, trade = None, None
+                    try:
+                        mode, trade = fut.result()
+                    except Exception as e:
+                        print(f"{soft_red}[Pipeline] User {uid} failed: {e}{RESET_COLOR}")
+                    if not put((uid, mode, trade)):
+                        break
+            finally:
+                for _, fut in list(fetching) + list(evaluating):
+                    fut.cancel()
+                put(_PIPELINE_DONE)
+
+        threading.Thread(target=evaluator, name="evaluate", daemon=True).start()
+        try:
+            while True:
+                item = results.get()
+                if item is _PIPELINE_DONE:
+                    return
+                yield item
+        finally:
+            stop.set()
+
+# =====================
+# Network benchmark (local mock server)
+# =====================
+def _start_mock_upstream(latency_ms: float, items_per_user: int):
+    """Threaded local server imitating the can-trade-with, collectibles and trade-ads endpoints."""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    inventory = {'data': [{'userAssetId': i, 'assetId': 1000 + i, 'name': f'Item {i}',
+                           'recentAveragePrice': 1000 + 37 * i, 'isOnHold': False}
+                          for i in range(items_per_user)],
+                 'nextPageCursor': None}
+    routes = [
+        (re.compile(r"^/v1/users/\d+/can-trade-with$"), json.dumps({'canTrade': True}).encode()),
+        (re.compile(r"^/v1/users/\d+/assets/collectibles$"), json.dumps(inventory).encode()),
+        (re.compile(r"^/tradeads/v1/getrecentads$"),
+         json.dumps({'success': True, 'trade_ads': [[0, 0, uid] for uid in range(1, 51)]}).encode()),
+    ]
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, like the real upstreams
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency_ms / 1000.0)
+            path = urlsplit(self.path).path
+            body = next((b for rx, b in routes if rx.match(path)), None)
+            self.send_response(200 if body is not None else 404)
+            body = body or b"{}"
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 1024
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, name="mock-upstream", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def benchmark_network(users: int = 200, latency_ms: float = 40.0, items_per_user: int = 50):
+    """
+    Prefetches `users` counterparties (can-trade check + inventory) from a
+    local mock server three ways: serial sync, threaded sync and asyncio.
+    Rate limiting is disabled so only the network layer is measured.
+    """
+    global http_client, INVENTORY_CACHE_ENABLED
+    server, base = _start_mock_upstream(latency_ms, items_per_user)
+    overrides = {urlsplit(u).netloc: base for u in (inventory_url_template, trade_check_url_template, user_ids_api_url)}
+    no_limits = RateLimiter({})
+    user_ids = list(range(1, users + 1))
+    results = []
+
+    saved_client, saved_cache_enabled = http_client, INVENTORY_CACHE_ENABLED
+    INVENTORY_CACHE_ENABLED = False  # every run must really hit the network
+    http_client = HttpClient(host_overrides=overrides, limiter=no_limits, pool_size=max(HTTP_POOL_SIZE, PIPELINE_WORKERS))
+    try:
+        t0 = time.perf_counter()
+        serial = [prefetch_counterparty(uid) for uid in user_ids]
+        results.append(("sync serial", time.perf_counter() - t0, serial))
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as pool:
+            threaded = list(pool.map(prefetch_counterparty, user_ids))
+        results.append((f"sync {PIPELINE_WORKERS} threads", time.perf_counter() - t0, threaded))
+    finally:
+        http_client.close()
+        http_client = saved_client
+
+    if aiohttp is not None:
+        async def run_async():
+            async with AsyncHttpClient(host_overrides=overrides, limiter=no_limits) as client:
+                return await asyncio.gather(*(prefetch_counterparty_async(client, uid) for uid in user_ids))
+        t0 = time.perf_counter()
+        gathered = asyncio.run(run_async())
+        results.append((f"asyncio {HTTP_ASYNC_MAX_IN_FLIGHT} in flight", time.perf_counter() - t0, list(gathered)))
+    else:
+        print(f"{soft_red}[Bench] aiohttp not installed; skipping the asyncio run.{RESET_COLOR}")
+    server.shutdown()
+    INVENTORY_CACHE_ENABLED = saved_cache_enabled
+
+    print(f"{white}[Bench] {users} users, {latency_ms:.0f} ms mock latency, {items_per_user} items each{RESET_COLOR}")
+    reference = [(uid, len(inv or [])) for uid, inv in results[0][2]]
+    for label, secs, got in results:
+        same = [(uid, len(inv or [])) for uid, inv in got] == reference
+        print(f"{light_gray} {label:<28} {secs:7.2f}s  {users / secs:8.1f} users/s  "
+              f"{'results match' if same else 'RESULTS DIFFER'}{RESET_COLOR}")
+
 # =====================
 # MAIN LOOP
 # =====================
@@ -1301,8 +4192,7 @@ def run_owner_tracking():
             out_csv_handle.write("user_id,username,owned_since_days\n")
             out_csv_handle.flush()
 
-        driver = build_driver()
-        try:
+        with driver_pool.session() as driver:
             records = scrape_owners(
                 driver,
                 asset_id=TARGET_ASSET_ID,
@@ -1316,11 +4206,6 @@ def run_owner_tracking():
                 out_handle=out_handle if bool(FLUSH_PER_PAGE) else None,
                 out_csv_handle=out_csv_handle if bool(FLUSH_PER_PAGE) else None
             )
-        finally:
-            try:
-                driver.quit()
-            except Exception:
-                pass
     finally:
         # If we didn't flush per page, write everything now
         if out_handle is not None and bool(FLUSH_PER_PAGE) == False:
@@ -1343,25 +4228,209 @@ def run_owner_tracking():
     # Return just the user IDs for integration with the trading bot
     return [rec["user_id"] for rec in records]
 
-def fetch_limiteds(user_id):
-    api_url = inventory_url_template.format(user_id)
-    try:
-        r = requests.get(api_url, timeout=10 if FAST_MODE else 20)
-        r.raise_for_status()
-        data = r.json()
-        limiteds = [item for item in data.get('data', []) if not item.get('isOnHold', True)]
-        return [{
-            'userAssetId': item['userAssetId'],
-            'assetId': item['assetId'],
-            'name': item['name'],
-            'recentAveragePrice': item.get('recentAveragePrice', 0) or 0,
-        } for item in limiteds]
-    except Exception:
-        return []
+def evaluate_counterparty(your_inventory, other_inventory):
+    """
+    Runs the finders enabled in trading_modes against one counterparty.
+    Returns (mode, trade) for the first mode, in priority order, with a hit; (None, None) otherwise.
+    """
+    other_inventory, item_values, memo = _evaluation_context(your_inventory, other_inventory)
+    if memo.get("result") is not None:
+        return memo["result"]
+    result, complete = evaluate_modes(your_inventory, other_inventory, item_values)
+    _remember_evaluation(memo, result, complete)
+    return result
+
+def _evaluation_context(your_inventory, other_inventory):
+    """
+    Front half of an evaluation, always run in this process: keep-list
+    filter, snapshot (refreshing if needed) and memo lookup.
+    Returns (other_inventory, item_values, memo); memo["result"] is set on a hit.
+    """
+    other_inventory = [item for item in other_inventory if item['assetId'] not in ITEMS_I_WANT_TO_KEEP]
+
+    # Ensure needed IDs are present in cache
+    need_ids = [it['assetId'] for it in your_inventory + other_inventory]
+    item_values = get_item_values_cached(ensure_ids=need_ids)
+
+    memo = {"need_ids": need_ids}
+    if EVAL_CACHE_ENABLED:
+        memo["key"] = evaluation_cache.key(your_inventory, other_inventory)
+        memo["version"] = value_index(item_values).version
+        memo["result"] = evaluation_cache.lookup(memo["key"], memo["version"])
+    return other_inventory, item_values, memo
+
+def _remember_evaluation(memo: dict, result, complete: bool):
+    # a search cut short by the budget may improve next time; don't memoize it
+    if "key" in memo and complete:
+        evaluation_cache.store(memo["key"], memo["version"], memo["need_ids"], result)
+
+def evaluate_modes(your_inventory, other_inventory, item_values):
+    """
+    The search itself: no network, no memo. Returns ((mode, trade), complete),
+    complete False when a search budget cut any finder short.
+    """
+    # Hard-filter projections early (fewer combos later)
+    your_inventory  = drop_projecteds(your_inventory,  item_values, for_offer_side=True)
+    other_inventory = drop_projecteds(other_inventory, item_values, for_offer_side=False)
+
+    # Determine which trade types to search for based on trading modes
+    trading_modes = config['trading_preferences'].get('trading_modes', ['upgrade'])
+    if not isinstance(trading_modes, list):
+        trading_modes = [trading_modes]  # Backward compatibility
+
+    # search.budget_ms caps the whole counterparty: each finder gets what is left
+    started = time.perf_counter()
+    metas = []
+
+    def run_finder(finder):
+        meta = {}
+        metas.append(meta)
+        deadline_ms = None
+        if SEARCH_BUDGET_MS > 0:
+            deadline_ms = max(1e-3, SEARCH_BUDGET_MS - (time.perf_counter() - started) * 1000.0)
+        return finder(your_inventory, other_inventory, item_values, deadline_ms=deadline_ms, meta=meta)
+
+    finders = {m for m in trading_modes if m in MODE_BITS} | ({'valued'} if UPGRADE_TO_VALUED_ONLY else set())
+    if SEARCH_UNIFIED and len(finders) > 1 and SEARCH_STRATEGY == "first" \
+            and SEARCH_BUDGET_MS <= 0 and SEARCH_MAX_EVALS <= 0:
+        # one pass over shared subset sums; modes ranked below the winner are skipped
+        mode_lists = search_modes(your_inventory, other_inventory, item_values, trading_modes)
+    else:
+        upgrade_to_valued_trades = []
+        upgrade_trades = []
+        downgrade_trades = []
+        onevone_trades = []
+
+        if UPGRADE_TO_VALUED_ONLY or 'valued' in trading_modes:
+            upgrade_to_valued_trades = run_finder(find_upgrade_to_valued_trade)
+        if 'upgrade' in trading_modes:
+            upgrade_trades = run_finder(find_upgrade_trade)
+        if 'downgrade' in trading_modes:
+            downgrade_trades = run_finder(find_downgrade_trade)
+        if '1v1' in trading_modes:
+            onevone_trades = run_finder(find_1v1_trade)
+
+        mode_lists = {
+            'valued':    upgrade_to_valued_trades or [],
+            'upgrade':   upgrade_trades or [],
+            'downgrade': downgrade_trades or [],
+            '1v1':       onevone_trades or [],
+        }
+
+    # pick first non-empty list following the order in trading_modes
+    result = (None, None)
+    for mode in trading_modes:
+        lst = mode_lists.get(mode, [])
+        if lst:
+            result = (mode, lst[0])
+            break
+    return result, not any(meta.get("exhausted") for meta in metas)
+
+def print_trade(label, trade, other_user_id):
+    my_items_display = ', '.join([item['name'] for item in trade['items']])
+    their_items_display = ', '.join([item['name'] for item in trade['their_items']])
+    tradelink = generate_tradelink(other_user_id, [item['userAssetId'] for item in trade['their_items']])
+    win_percentage = calculate_win_percentage(trade['rap_gain'], trade['my_total_rap'])
+    print(
+        f"{medium_gray}[{label}]{RESET_COLOR}\n"
+        f"{white}Offering [{my_items_display}] ({trade['my_total_rap']}) "
+        f"for [{their_items_display}] ({trade['their_total_rap']}) | {trade['rap_gain']} "
+        f"{soft_green}({win_percentage:.2f}%) {RESET_COLOR}\n"
+        f"{medium_gray}[using Rolimon's snapshot age: {values_snapshot_age_seconds()}s]{RESET_COLOR}\n"
+        f"{light_gray}{tradelink}{RESET_COLOR}"
+    )
+
+def send_best_trade(account: Account, other_user_id, best_mode, best, missing_sides: Optional[list] = None):
+    print(f"{light_gray}-------{RESET_COLOR}")
+    print(f"{white}User ID: {other_user_id} (from {account.name}){RESET_COLOR}")
+    print_trade(best_mode, best, other_user_id)
+
+    ok, use_ui = False, True
+    if SENDER_BACKEND == "http":
+        outcome = account.sender.send(other_user_id,
+                                      [it["userAssetId"] for it in best["items"]],
+                                      [it["userAssetId"] for it in best["their_items"]])
+        ok = outcome.sent
+        use_ui = not ok and outcome.fallback and SENDER_FALLBACK
+        if use_ui:
+            print(f"{medium_gray}[HTTP] Falling back to the trade UI for user {other_user_id}.{RESET_COLOR}")
+
+    if use_ui:
+        # Ship via Selenium
+        my_sel = [{"assetId": it["assetId"], "name": it["name"]} for it in best["items"]]
+        their_sel = [{"assetId": it["assetId"], "name": it["name"]} for it in best["their_items"]]
+        try:
+            with account.drivers.session() as driver:
+                ok = send_trade_via_selenium(driver, other_user_id, my_sel, their_sel, missing_sides,
+                                             totp_secret=account.totp_secret)
+        except WebDriverException as e:
+            print(f"{soft_red}[UI] Browser session failed: {e.msg or e}{RESET_COLOR}")
+            ok = False
+
+    if not ok:
+        print(f"{soft_red}[FAIL] Trade send failed for user {other_user_id}.{RESET_COLOR}")
+    else:
+        print(f"{soft_green}[DONE] Trade attempted for user {other_user_id}.{RESET_COLOR}")
+
+    print(f"{light_gray}-------{RESET_COLOR}")
+    return ok
+
+def evaluate_for_accounts(accounts: List[Account], other_inventory):
+    """
+    Matches one counterparty against each account in turn (callers pass them
+    least busy first). Returns (mode, trade) for the first account with a
+    hit; the trade carries that account's name under "account" and its items
+    are already reserved in that account's SelfInventory.
+    """
+    for account in accounts:
+        mode, trade = match_for_account(account, other_inventory)
+        if trade:
+            return mode, {**trade, "account": account.name}
+    return None, None
+
+def match_for_account(account: Account, other_inventory):
+    """evaluate_counterparty for one account, reserving the trade's items before returning it."""
+    while True:
+        mode, trade = evaluate_counterparty(account.inventory.available(), other_inventory)
+        if not trade or account.inventory.reserve(trade['items']):
+            return mode, trade
+        # a send thread's retry took some of these items since available(); search again without them
+
+def deliver_trade(account: Account, other_user_id, best_mode, best) -> bool:
+    """
+    Sends one trade from `account`, retrying once on a stale inventory. Runs
+    on the account's send thread. The trade's items were reserved when it was
+    matched; they are released again if it doesn't go out.
+    """
+    if not account.limit.allows():
+        account.inventory.release(best['items'])
+        print(f"{medium_gray}[Accounts] {account.name} hit its outbound limit; user {other_user_id} skipped.{RESET_COLOR}")
+        return False
+    missing = []
+    ok = send_best_trade(account, other_user_id, best_mode, best, missing)
+    if not ok:
+        account.inventory.release(best['items'])
+    if not ok and "your" in missing:
+        # something of ours left since the last refresh
+        account.inventory.refresh()
+    if not ok and "their" in missing:
+        # their inventory moved on since we cached it: fetch it again and retry once
+        inventory_cache.invalidate(other_user_id)
+        _, other_inventory = prefetch_counterparty(other_user_id)
+        best_mode, best = evaluate_for_accounts([account], other_inventory) if other_inventory else (None, None)
+        if best:
+            print(f"{medium_gray}[Cache] Refetched inventory for user {other_user_id}; retrying.{RESET_COLOR}")
+            ok = send_best_trade(account, other_user_id, best_mode, best)
+            if not ok:
+                account.inventory.release(best['items'])
+    if ok:
+        account.limit.record()
+    save_processed_owner(other_user_id)
+    return ok
 
 def main():
     # Initialize price cache at startup
-    item_values = get_item_values_cached()
+    get_item_values_cached()
     print(f"{medium_gray}[Cache] Loaded Rolimon's snapshot (age: {values_snapshot_age_seconds()}s){RESET_COLOR}")
 
     # Run owner tracking if enabled
@@ -1374,23 +4443,55 @@ def main():
     processed_users = load_processed_owners()
     print(f"{medium_gray}[Info] Loaded {len(processed_users)} previously processed users.{RESET_COLOR}")
     
-    seen_user_ids = set()
+    # owner tracking walks its list once; trade-ad users come back after USER_REVISIT_SECS
+    seen_user_ids = set() if owner_tracking_users else RecentUsers()
     
     # Refresh cache if stale before processing users
     if _should_refresh(time.time()):
-        item_values = get_item_values_cached()
+        get_item_values_cached()
         print(f"{medium_gray}[Cache] Refreshed Rolimon's snapshot (age: {values_snapshot_age_seconds()}s){RESET_COLOR}")
 
-    your_inventory = fetch_limiteds(USER_ID)
-    your_inventory = [item for item in your_inventory if item['assetId'] not in ITEMS_I_WANT_TO_KEEP]
-    your_inventory.sort(key=lambda x: get_item_value(x, item_values), reverse=True)
-
-    display_inventory(your_inventory)
+    accounts = load_accounts()
+    for account in accounts:
+        account.inventory.refresh()
+        if len(accounts) > 1:
+            print(f"{white}[{account.name}]{RESET_COLOR}")
+        display_inventory(account.inventory.available())
     print(f"\n{white}Finding Trades...{RESET_COLOR}\n")
 
-    driver = build_driver()
-    ensure_logged_in(driver)
-
+    if SENDER_BACKEND != "http" or SENDER_FALLBACK:
+        for account in accounts:
+            account.drivers.warm()
+    if SENDER_BACKEND == "http":
+        print(f"{medium_gray}[Send] Offers go over HTTP{' (trade UI as fallback)' if SENDER_FALLBACK else ''}.{RESET_COLOR}")
+
+    for account in accounts:
+        account.inventory.start()
+    price_refresher.start()
+    dispatcher = TradeDispatcher(accounts, deliver_trade)
+    if len(accounts) > 1:
+        print(f"{medium_gray}[Accounts] Sending from {len(accounts)} accounts in parallel.{RESET_COLOR}")
+    # the capacity wait sits in the evaluate step: a batch can fill every account part-way through
+    evaluate = lambda other_inventory: evaluate_for_accounts(dispatcher.available(), other_inventory)
+    pipeline = None
+    if PIPELINE_ENABLED:
+        fetcher = build_fetcher()
+        evaluator = None
+        if PIPELINE_EVAL_PROCESSES > 0:
+            if len(accounts) == 1:
+                evaluator = ProcessEvaluator(lambda: dispatcher.available()[0].inventory.available(),
+                                             inventory=accounts[0].inventory)
+            else:
+                print(f"{medium_gray}[Pipeline] Several accounts: finders stay in-process.{RESET_COLOR}")
+        pipeline = CounterpartyPipeline(evaluate, fetcher=fetcher, evaluator=evaluator)
+        if evaluator:
+            print(f"{medium_gray}[Pipeline] Finders run in {evaluator.workers} worker process(es).{RESET_COLOR}")
+        print(f"{medium_gray}[Pipeline] {type(fetcher).__name__} fetch stage, prefetching up to {PIPELINE_PREFETCH} user(s).{RESET_COLOR}")
+
+    by_name = {account.name: account for account in accounts}
+    snapshot_swapped = threading.Event()
+    on_snapshot = lambda diff: snapshot_swapped.set()
+    snapshot_events.subscribe(on_snapshot)
     try:
         while True:
             # Get candidate users quickly
@@ -1399,116 +4500,48 @@ def main():
                 # Use owner tracking users if available
                 new_user_ids = [uid for uid in owner_tracking_users if uid not in seen_user_ids]
                 if not new_user_ids:
-                    # If we've processed all owner tracking users, exit
                     print(f"{white}[Owner Tracking] Finished processing all {len(owner_tracking_users)} users.{RESET_COLOR}")
-                    break
+                    remaining = [uid for uid in owner_tracking_users if uid not in processed_users]
+                    if not (OWNER_TRACKING_RESCAN and price_refresher.running and remaining):
+                        break
+                    print(f"{medium_gray}[Owner Tracking] Re-scanning {len(remaining)} user(s) after the next price refresh.{RESET_COLOR}")
+                    # a snapshot swapped in during the scan counts too
+                    while not snapshot_swapped.wait(1.0):
+                        pass
+                    snapshot_swapped.clear()
+                    seen_user_ids.clear()
+                    continue
+                seen_user_ids.update(new_user_ids)
             else:
                 # Fall back to fetching new user IDs from API
                 new_user_ids = fetch_new_user_ids(seen_user_ids)
-            
-            for other_user_id in new_user_ids:
-                if other_user_id in processed_users:
-                    continue
-                if not can_trade_with(other_user_id):
-                    processed_users.add(other_user_id)
-                    continue
 
-                other_inventory = fetch_limiteds(other_user_id)
-                if not other_inventory:
-                    processed_users.add(other_user_id)
-                    continue
-
-                other_inventory = [item for item in other_inventory if item['assetId'] not in ITEMS_I_WANT_TO_KEEP]
-                your_inventory.sort(key=lambda x: get_item_value(x, item_values), reverse=True)
-
-                # Ensure needed IDs are present in cache
-                need_ids = [it['assetId'] for it in your_inventory + other_inventory]
-                item_values = get_item_values_cached(ensure_ids=need_ids)
-
-                # Hard-filter projections early (fewer combos later)
-                your_inventory  = drop_projecteds(your_inventory,  item_values, for_offer_side=True)
-                other_inventory = drop_projecteds(other_inventory, item_values, for_offer_side=False)
-
-                # Determine which trade types to search for based on trading modes
-                trading_modes = config['trading_preferences'].get('trading_modes', ['upgrade'])
-                if not isinstance(trading_modes, list):
-                    trading_modes = [trading_modes]  # Backward compatibility
-                
-                upgrade_to_valued_trades = []
-                upgrade_trades = []
-                downgrade_trades = []
-                onevone_trades = []
-
-                if UPGRADE_TO_VALUED_ONLY or 'valued' in trading_modes:
-                    upgrade_to_valued_trades = find_upgrade_to_valued_trade(your_inventory, other_inventory, item_values)
-                if 'upgrade' in trading_modes:
-                    upgrade_trades = find_upgrade_trade(your_inventory, other_inventory, item_values)
-                if 'downgrade' in trading_modes:
-                    downgrade_trades = find_downgrade_trade(your_inventory, other_inventory, item_values)
-                if '1v1' in trading_modes:
-                    onevone_trades = find_1v1_trade(your_inventory, other_inventory, item_values)
-
-                mode_lists = {
-                    'valued':    upgrade_to_valued_trades or [],
-                    'upgrade':   upgrade_trades or [],
-                    'downgrade': downgrade_trades or [],
-                    '1v1':       onevone_trades or [],
-                }
-
-                # pick first non-empty list following the order in trading_modes
-                best = None
-                best_mode = None
-                for mode in trading_modes:
-                    lst = mode_lists.get(mode, [])
-                    if lst:
-                        best = lst[0]
-                        best_mode = mode
-                        break
+            candidates = list(dict.fromkeys(uid for uid in new_user_ids if uid not in processed_users))
+            if pipeline:
+                results = pipeline.run(candidates)
+            else:
+                results = iter_counterparties_serial(candidates, evaluate)
 
-                # if no trades found in configured modes, skip this user
+            for other_user_id, best_mode, best in results:
+                # can't trade, empty inventory or no trade in configured modes: skip this user for now
                 if not best:
-                    processed_users.add(other_user_id)
                     continue
-
-                print(f"{light_gray}-------{RESET_COLOR}")
-                print(f"{white}User ID: {other_user_id}{RESET_COLOR}")
-
-                def print_trade(label, trade):
-                    my_items_display = ', '.join([item['name'] for item in trade['items']])
-                    their_items_display = ', '.join([item['name'] for item in trade['their_items']])
-                    tradelink = generate_tradelink(other_user_id, [item['userAssetId'] for item in trade['their_items']])
-                    win_percentage = calculate_win_percentage(trade['rap_gain'], trade['my_total_rap'])
-                    print(
-                        f"{medium_gray}[{label}]{RESET_COLOR}\n"
-                        f"{white}Offering [{my_items_display}] ({trade['my_total_rap']}) "
-                        f"for [{their_items_display}] ({trade['their_total_rap']}) | {trade['rap_gain']} "
-                        f"{soft_green}({win_percentage:.2f}%) {RESET_COLOR}\n"
-                        f"{medium_gray}[using Rolimon's snapshot age: {values_snapshot_age_seconds()}s]{RESET_COLOR}\n"
-                        f"{light_gray}{tradelink}{RESET_COLOR}"
-                    )
-
-                print_trade(best_mode, best)
-
-                # Ship via Selenium
-                my_sel = [{"assetId": it["assetId"], "name": it["name"]} for it in best["items"]]
-                their_sel = [{"assetId": it["assetId"], "name": it["name"]} for it in best["their_items"]]
-
-                ok = send_trade_via_selenium(driver, other_user_id, my_sel, their_sel)
-                if not ok:
-                    print(f"{soft_red}[FAIL] Selenium send failed for user {other_user_id}.{RESET_COLOR}")
-                else:
-                    print(f"{soft_green}[DONE] Trade attempted for user {other_user_id}.{RESET_COLOR}")
-
-                print(f"{light_gray}-------{RESET_COLOR}")
                 processed_users.add(other_user_id)
-                save_processed_owner(other_user_id)
+                # the process evaluator doesn't tag trades; it only runs with a single account
+                dispatcher.submit(by_name[best.get("account", accounts[0].name)], other_user_id, best_mode, best)
 
-            time.sleep(0.25 if FAST_MODE else 1.0)
+            # trade-ad polling is paced by its rate-limit bucket; fixed sleep only if that's disabled
+            if "trade_ads" not in rate_limiter.buckets:
+                time.sleep(0.25 if FAST_MODE else 1.0)
     finally:
-        try:
-            driver.quit()
-        except Exception:
-            pass
+        snapshot_events.unsubscribe(on_snapshot)
+        dispatcher.close()
+        price_refresher.stop()
+        for account in accounts:
+            account.close()
+        if pipeline:
+            pipeline.close()
+        driver_pool.close()
 
 # Reuse value helpers (placed after to keep file compact)
 def fetch_item_values():  # override earlier alias for clarity
@@ -1516,6 +4549,15 @@ def fetch_item_values():  # override earlier alias for clarity
     return get_item_values_cached()
 
 if __name__ == "__main__":
-    main()
+    # frozen (PyInstaller) builds: spawned evaluator workers must stop here, not rerun the bot
+    multiprocessing.freeze_support()
+    if "--bench-network" in sys.argv[1:]:
+        benchmark_network()
+    elif "--export-price-cache" in sys.argv[1:]:
+        export_price_cache_json()
+    elif "--import-price-cache" in sys.argv[1:]:
+        import_price_cache_json()
+    else:
+        main()
 
 